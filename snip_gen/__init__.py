@@ -1,5 +1,6 @@
 """Generate code from an LLM based on coverage data."""
 
+import os
 import typing as t
 from pathlib import Path
 
@@ -10,10 +11,13 @@ MODULE_ROOT: Path = Path(__file__).parent
 
 DEFAULT_COVERAGE: Path = MODULE_ROOT.parent / "coverage" / "coverage.json"
 
+# Directory where the LLM responses are cached, when caching is enabled.
+CACHE_DIR: Path = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "snip_gen"
+
 # Default file extension for generated code snippets.
 DEFAULT_FILE_EXTENSION: str = ".def"
-# Prefixes to be removed from the LLM output, if present.
-CODEBLOCK_STRIPPED_PREFIX: list[str] = ["```def", "```"]
+# Prefixes to be removed from the LLM output, if present. Only the first matching one is removed.
+CODEBLOCK_STRIPPED_PREFIX: tuple[str, ...] = ("```def", "```")
 
 MODEL_HINT = t.Literal["openai", "mistral", "gemini", "gemini-pro"]
 
@@ -26,9 +30,31 @@ LITELLM_MODELS: dict[str, str] = {
 
 MODELS: list[str] = list(LITELLM_MODELS.keys())
 
+# Maximum number of concurrent requests sent to each model provider.
+MAX_CONCURRENT_REQUESTS: dict[str, int] = {
+    "openai": 10,
+    "mistral": 4,
+    "gemini-pro": 8,
+    "gemini": 8,
+}
+
+# Requests and tokens per minute sent to each model provider, below their rate limits.
+# They match the first paid usage tier of each provider, and should be adapted to your account.
+RATE_LIMITS: dict[str, tuple[int, int]] = {
+    "openai": (500, 30_000),
+    "mistral": (60, 500_000),
+    "gemini-pro": (150, 2_000_000),
+    "gemini": (1_000, 1_000_000),
+}
+
 MAX_FILE_SIZE_BYTES: int = 100 * 1024  # 100 KB
 
 MAX_ATTEMPTS = 6  # Maximum number of attempts to invoke the LLM before giving up.
 # In case we hit the per-minute rate limit, we will wait for 60 seconds before retrying.
 BASE_WAIT = 60  # Base of the exponential backoff in seconds
 EXPONENTIAL_FACTOR = 6  # Exponential factor for backoff
+MAX_WAIT = 600  # Maximum delay between two attempts in seconds
+
+# Reasoning models spend part of their output tokens thinking before writing the design.
+MAX_OUTPUT_TOKENS = 16384  # Maximum number of tokens generated by a single LLM invocation
+LLM_TIMEOUT = 600  # Maximum duration of a single LLM invocation in seconds
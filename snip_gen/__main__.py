@@ -1,64 +1,85 @@
 """Generate code with an LLM."""
 
 import argparse
+import importlib
+import logging
 import sys
 
-from .analyze_coverage import register as register_coverage
-from .gen_seed import register as register_seed
-from .gen_snippet import register as register_snippet
-from .verify_code import register as register_verify
+LOG_FORMAT = "%(levelname)s - %(message)s"
+
+# Command name -> (module implementing it, description, help).
+# Modules are only imported once the command to run is known.
+COMMANDS: dict[str, tuple[str, str, str]] = {
+    "coverage": ("analyze_coverage", "Analyze coverage files to find low line coverage.", "Analyze coverage"),
+    "snippet": ("gen_snippet", "Generate code snippets from a specific file.", "Generate a code snippet"),
+    "seed": (
+        "gen_seed",
+        "Generate code seeds to exercise target files using an LLM.",
+        "Handle code seed generation",
+    ),
+    "verify": ("verify_code", "Verify a program against a library.", "Verify a program"),
+}
+
+
+def configure_logging() -> None:
+    """Configure the root logger, unless the application embedding snip_gen already did."""
+    if not logging.getLogger().handlers:
+        logging.basicConfig(level=logging.INFO, format=LOG_FORMAT)
+
+
+def run_command(command: str, args: list[str], prog: str | None = None) -> None:
+    """Import the module implementing a command, then parse its arguments and run it.
+
+    Args:
+        command (str): The name of the command to run.
+        args (list[str]): The command-line arguments of the command.
+        prog (str | None): The program name displayed in the help messages.
+    """
+    module_name, description, _ = COMMANDS[command]
+    module = importlib.import_module(f".{module_name}", __package__)
+
+    parser = argparse.ArgumentParser(description=description, prog=prog)
+    module.register(parser)
+
+    parsed_args = parser.parse_args(args)
+    configure_logging()
+    parsed_args.func(parsed_args)
 
 
 def main(args: list[str] | None = None) -> None:
     """Main CLI entry point for snip_gen."""
     parser = argparse.ArgumentParser(description="Generate code and analyze coverage.", prog="snip_gen")
-    subparsers = parser.add_subparsers(help="Command to run")
-    register_coverage(
-        subparsers.add_parser(
-            "coverage", description="Analyze coverage files to find low line coverage.", help="Analyze coverage"
-        )
-    )
-    register_snippet(
-        subparsers.add_parser(
-            "snippet", description="Generate code snippets from a specific file.", help="Generate a code snippet"
-        )
-    )
-    register_seed(
-        subparsers.add_parser(
-            "seed",
-            description="Generate code seeds to exercise target files using an LLM.",
-            help="Handle code seed generation",
-        )
-    )
-    register_verify(
-        subparsers.add_parser("verify", description="Verify a program against a library.", help="Verify a program")
-    )
-    parsed_args = parser.parse_args(args)
-    if hasattr(parsed_args, "func"):
-        parsed_args.func(parsed_args)
-    else:
+    subparsers = parser.add_subparsers(dest="command", help="Command to run")
+    for command, (_, description, help_) in COMMANDS.items():
+        # The actual arguments of the command, including --help, are handled by run_command.
+        subparsers.add_parser(command, description=description, help=help_, add_help=False)
+
+    parsed_args, remaining = parser.parse_known_args(args)
+    if parsed_args.command is None:
         parser.print_usage()
         sys.exit(1)
 
+    run_command(parsed_args.command, remaining, f"{parser.prog} {parsed_args.command}")
+
 
 def snippet_command() -> None:
     """Run the snippet generation command."""
-    main(["snippet", *sys.argv[1:]])
+    run_command("snippet", sys.argv[1:])
 
 
 def coverage_command() -> None:
     """Run the coverage analysis command."""
-    main(["coverage", *sys.argv[1:]])
+    run_command("coverage", sys.argv[1:])
 
 
 def seed_command() -> None:
     """Run the seed generation command."""
-    main(["seed", *sys.argv[1:]])
+    run_command("seed", sys.argv[1:])
 
 
 def verify_command() -> None:
     """Run the code verification command."""
-    main(["verify", *sys.argv[1:]])
+    run_command("verify", sys.argv[1:])
 
 
 if __name__ == "__main__":
@@ -9,23 +9,25 @@ import typing as t
 from pathlib import Path
 
 from snip_gen import COVERAGE_MAX, DEFAULT_COVERAGE
-from snip_gen.typehints import CoverageArgs, load_coverage
+from snip_gen.typehints import CoverageArgs, iter_coverage
 
 if t.TYPE_CHECKING:
-    from snip_gen.typehints import Coverage, LowCoverageFiles
+    from snip_gen.typehints import CoverageItems, LowCoverageFiles
 
 
-logging.basicConfig(level=logging.INFO, format="%(levelname)s - %(message)s")
 logger = logging.getLogger(__name__)
 
 
 def find_low_coverage_from_json(
-    coverage_data: "Coverage", threshold: float, min_threshold: float = 0.0
+    coverage_data: "CoverageItems", threshold: float, min_threshold: float = 0.0
 ) -> "LowCoverageFiles":
     """Parse a fastcov JSON coverage file to find files within a coverage range.
 
+    Only the data of the files within the coverage range is retained,
+    so the coverage data can be streamed one file at a time.
+
     Args:
-        coverage_data: Raw coverage data.
+        coverage_data: Pairs of source file name and coverage data, such as `Coverage.items()`.
         threshold (float): The upper coverage percentage threshold (0-100).
             Files with coverage < threshold are considered.
         min_threshold (float, optional) : The lower coverage percentage threshold (0-100).
@@ -36,24 +38,27 @@ def find_low_coverage_from_json(
         A list of tuples (filename, percentage, data), sorted by percentage,
         for files where min_threshold <= coverage < threshold.
     """
-    coverage_results = []
+    low_coverage_files = []
+    file_count = 0
 
     logger.debug("Processing coverage data...")
-    for source_file_name, file_info in coverage_data.items():
-        lines_info = file_info.get("lines")
+    for source_file_name, file_info in coverage_data:
+        lines_info = file_info.lines
 
         if not lines_info:
             logger.warning(f"No lines information found for {source_file_name}. Skipping.")
             continue
 
-        coverage_percentage = len([cov for cov in lines_info.values() if cov > 0]) / len(lines_info) * 100.0
-
-        coverage_results.append((Path(source_file_name), float(coverage_percentage), file_info))
+        # Execution counts are never negative, so the uncovered lines are counted in C.
+        covered_lines = len(lines_info) - operator.countOf(lines_info.values(), 0)
+        coverage_percentage = covered_lines / len(lines_info) * 100.0
+        file_count += 1
 
-    logger.debug(f"Extracted coverage for {len(coverage_results)} files.")
+        # Filter for low coverage
+        if min_threshold <= coverage_percentage < threshold:
+            low_coverage_files.append((Path(source_file_name), float(coverage_percentage), file_info))
 
-    # Filter for low coverage
-    low_coverage_files = [res for res in coverage_results if min_threshold <= res[1] < threshold]
+    logger.debug(f"Extracted coverage for {file_count} files.")
 
     # Sort by coverage percentage (ascending)
     low_coverage_files.sort(key=operator.itemgetter(1))
@@ -133,7 +138,7 @@ def main(arguments: argparse.Namespace) -> None:
         sys.exit(1)
 
     try:
-        coverage_data: Coverage = load_coverage(args.fastcov_json)
+        coverage_data: CoverageItems = iter_coverage(args.fastcov_json)
     except json.JSONDecodeError:
         logger.critical(f"Error decoding JSON from {args.fastcov_json}. Is it a valid JSON file?")
         sys.exit(1)
@@ -161,8 +166,12 @@ def main(arguments: argparse.Namespace) -> None:
 
 
 if __name__ == "__main__":
+    from snip_gen.__main__ import configure_logging
+
     _parser = argparse.ArgumentParser(description="Analyze coverage files to find low line coverage.")
 
     register(_parser)
 
-    main(_parser.parse_args())
+    _args = _parser.parse_args()
+    configure_logging()
+    main(_args)
@@ -0,0 +1,111 @@
+"""Cache the responses of the LLM on disk."""
+
+import hashlib
+import json
+import logging
+import os
+import typing as t
+
+from snip_gen import CACHE_DIR
+
+if t.TYPE_CHECKING:
+    from pathlib import Path
+
+Messages = t.Sequence[t.Mapping[str, t.Any]]
+# The parameters of a request changing the response of the model, such as the number of candidates.
+Parameters = t.Mapping[str, t.Any]
+
+logger = logging.getLogger(__name__)
+
+
+class DiskCache:
+    """Cache the responses of the LLM on disk, keyed on the model, the messages sent to it and the parameters.
+
+    Only identical requests hit the cache. Each response is stored in its own file,
+    as the JSON list of its candidates.
+
+    Attributes:
+        directory (Path): The directory where the responses are stored.
+    """
+
+    def __init__(self, directory: "Path" = CACHE_DIR) -> None:
+        """Initialize the cache.
+
+        Args:
+            directory (Path): The directory where the responses are stored. It is created if needed.
+        """
+        self.directory = directory
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def key(model_name: str, messages: Messages, parameters: Parameters) -> str:
+        """Compute the key of a request.
+
+        Args:
+            model_name (str): The name of the model the request is sent to.
+            messages (Messages): The messages sent to the model, which must be serializable to JSON.
+            parameters (Parameters): The parameters of the request, which must be serializable to JSON.
+
+        Returns:
+            str: The key of the request.
+        """
+        payload = json.dumps(
+            {"model": model_name, "messages": messages, "parameters": parameters},
+            sort_keys=True,
+            separators=(",", ":"),
+        ).encode()
+        return hashlib.blake2b(payload, digest_size=32).hexdigest()
+
+    def _path(self, key: str) -> "Path":
+        """Get the path of the file storing a response.
+
+        Args:
+            key (str): The key of the request.
+
+        Returns:
+            Path: The path of the file.
+        """
+        return self.directory / f"{key}.json"
+
+    def get(self, model_name: str, messages: Messages, parameters: Parameters) -> list[str] | None:
+        """Get the cached response to a request.
+
+        Args:
+            model_name (str): The name of the model the request is sent to.
+            messages (Messages): The messages sent to the model.
+            parameters (Parameters): The parameters of the request.
+
+        Returns:
+            list[str] | None: The candidates of the cached response, or None if the request is not cached or unreadable.
+        """
+        path = self._path(self.key(model_name, messages, parameters))
+        try:
+            contents: list[str] = json.loads(path.read_bytes())
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError):
+            # A corrupted or unreadable entry is a cache miss: the request is sent again, and the entry replaced.
+            logger.warning("Ignoring the unreadable cached LLM response %s", path, exc_info=True)
+            return None
+
+        logger.info("Using cached LLM response.")
+        return contents
+
+    def set(self, model_name: str, messages: Messages, parameters: Parameters, contents: list[str]) -> None:
+        """Cache the response to a request.
+
+        Args:
+            model_name (str): The name of the model the request is sent to.
+            messages (Messages): The messages sent to the model.
+            parameters (Parameters): The parameters of the request.
+            contents (list[str]): The candidates generated by the model.
+        """
+        path = self._path(self.key(model_name, messages, parameters))
+        # Write to a temporary file first, so that concurrent readers never see a partial response.
+        temporary_path = path.with_suffix(f".{os.getpid()}.{id(contents)}.tmp")
+        try:
+            temporary_path.write_bytes(json.dumps(contents).encode("utf-8"))
+            temporary_path.replace(path)
+        except OSError:
+            logger.exception("Failed to cache the LLM response to %s", path)
+            temporary_path.unlink(missing_ok=True)
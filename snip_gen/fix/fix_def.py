@@ -1,137 +1,279 @@
 """Fix generated DEF code."""
 
 import re
+import typing as t
 
 BLOCK_RE = (
     "COMPONENTS|FILLS|GROUPS|NETS|NONDEFAULTRULES|PINS|PINPROPERTIES|"
     "PROPERTYDEFINITIONS|REGIONS|SCANCHAINS|SPECIALNETS|VIAS"
 )
 
-REPLACEMENTS: list[tuple[re.Pattern[str], str]] = [
-    (
-        re.compile(r"#.*?$", re.MULTILINE),  # Remove comments
-        "",
-    ),
-    (  # Fiw bad UNITS definition
-        re.compile(r"^\s*UNITS\s*?(?:DATABASE)?\s*?(?:MICRONS)?\s*?(\d+)\s*?;?", re.MULTILINE),
-        r"UNITS DISTANCE MICRONS \1;",
-    ),
-    (re.compile(r"END UNITS"), ""),
-    (  # Fix bad block definitions missing a semicolon
-        re.compile(
-            rf"^\s*({BLOCK_RE})\s*?(\d)\s*?$",
-            re.MULTILINE,
+# Orientations the LLM borrows from LEF, mapped to their DEF counterpart.
+ORIENTATIONS: dict[str, str] = {
+    "R0": "N",
+    "R90": "W",
+    "R180": "S",
+    "R270": "E",
+    "MX90": "FW",
+    "MY90": "FE",
+    "MX": "FS",
+    "MY": "FN",
+}
+
+# Longest orientations first, so that MX90 is never matched as MX.
+ORIENTATION_RE = "|".join(sorted(ORIENTATIONS, key=len, reverse=True))
+
+Replacement = str | t.Callable[[re.Match[str]], str]
+# A pattern, its replacement, and whether it must be applied until it no longer matches.
+# Only rules whose replacement can create a new match need to be applied more than once.
+Rule = tuple[re.Pattern[str], Replacement, bool]
+
+UNITS_RULE: Rule = (  # Fiw bad UNITS definition
+    re.compile(r"^\s*UNITS\s*?(?:DATABASE)?\s*?(?:MICRONS)?\s*?(\d+)\s*?;?"),
+    r"UNITS DISTANCE MICRONS \1;",
+    False,
+)
+
+# A LEF-style UNITS statement, which may span several lines, up to its END statement which is removed.
+UNITS_SECTION = re.compile(r"^[ \t]*+UNITS\b(?P<body>.*?)^[ \t]*+END UNITS", re.DOTALL | re.MULTILINE)
+
+# Rules only applying within a single line, run in a single pass over the lines.
+# They are grouped by the literals which must appear in a line for them to match.
+# Comments and MUSTJOIN nets are handled separately, before these rules.
+LINE_REPLACEMENTS: dict[str, list[Rule]] = {
+    "UNITS": [UNITS_RULE],
+    BLOCK_RE: [
+        (  # Fix bad block definitions missing a semicolon
+            re.compile(rf"^\s*({BLOCK_RE})\s*?(\d)\s*?$"),
+            r"\1 \2 ;",
+            False,
         ),
-        r"\1 \2 ;",
-    ),
-    (  # Fix bad VIA LAYER definitions
-        re.compile(r"^\s*(VIAS.*)LAYER (\w+) RECT(.*END VIAS)", re.DOTALL | re.MULTILINE),
-        r"\1RECT \2\3",
-    ),
-    (  # Remove ANTENNA definitions
-        re.compile(r"^\s*\+\s*?ANTENNA\w+\s+[\d.]+\s+\w+\s+\w+", re.MULTILINE),
-        "",
-    ),
-    (
-        re.compile(r"^\s*(PINS.*^\s*)(LAYER|PORT)(.*END PINS)", re.DOTALL | re.MULTILINE),
-        r"\1+ \2\3",  # Add a '+' before LAYER or PORT in PINS
-    ),
-    (  # Remove any MUSTJOIN net
-        re.compile(r"^.*MUSTJOIN.*$", re.MULTILINE),
-        "",
-    ),
-    (
-        re.compile(r"^\s*(PINS.*)LAYER\s+(\w+)\s+RECT(.*END PINS)", re.DOTALL | re.MULTILINE),
-        r"\1LAYER \2\3",  # Remove LAYER xxx RECT from PINS
-    ),
-    (
-        re.compile(r"^\s*(SPECIALNETS.*)WIDTH(.*END SPECIALNETS)", re.DOTALL | re.MULTILINE),
-        r"\1\2",  # Remove WIDTH from SPECIALNETS
-    ),
-    (
-        re.compile(r"^\s*(NETS.*)WIDTH(?:\s+\d+)?(.*END NETS)", re.DOTALL | re.MULTILINE),
-        r"\1\2",  # Remove WIDTH from NETS
-    ),
-    (
-        re.compile(
-            r"^\s*((COMPONENTS|PINS).*)(PLACED|FIXED|COVER)\s+(\d+)\s+(\d+)(\s+\w+.*END \2)", re.DOTALL | re.MULTILINE
+    ],
+    "ANTENNA": [
+        (  # Remove ANTENNA definitions
+            re.compile(r"^\s*\+\s*?ANTENNA\w+\s+[\d.]+\s+\w+\s+\w+"),
+            "",
+            True,
         ),
-        r"\1\2 ( \3 \4 )\5",
-    ),
-    (
-        re.compile(r"^\s*ROW\s+(\w+)\s+(\w+)\s+\((\d+)\s+(\d+)\s*\)?", re.MULTILINE),
-        r"ROW \1 \2 \3 \4",
-    ),  # Fix issue where generated ROW have parentheses around coordinates
-    (
-        re.compile(r"^\s*(ROW\s+\w+\s+\w+\s+\d+\s+\d+\s+\w+\s+DO\s+\d+\s+BY\s+\d+\s+STEP\s+\d+\s+);", re.MULTILINE),
-        r"\1 0 ;",  # Add missing 0 Y coordinate in ROW definition
-    ),
-    (
-        re.compile(
-            r"^\s*(NETS.*)(COVER|FIXED|ROUTED|NOSHIELD|NEW)\s+(\w+)\s+\d+(.*END NETS)", re.DOTALL | re.MULTILINE
+    ],
+    "ROW": [
+        (
+            re.compile(r"^\s*ROW\s+(\w+)\s+(\w+)\s+\((\d+)\s+(\d+)\s*\)?"),
+            r"ROW \1 \2 \3 \4",
+            False,
+        ),  # Fix issue where generated ROW have parentheses around coordinates
+        (
+            re.compile(r"^\s*(ROW\s+\w+\s+\w+\s+\d+\s+\d+\s+\w+\s+DO\s+\d+\s+BY\s+\d+\s+STEP\s+\d+\s+);"),
+            r"\1 0 ;",  # Add missing 0 Y coordinate in ROW definition
+            False,
         ),
-        r"\1\2 \3 \4",  # Remove incorrect width specification in NETS
-    ),
-    (
-        re.compile(
-            r'^\s*(PROPERTYDEFINITIONS.*)^(\s*\w+)\s+"(\w+)"?(.*END PROPERTYDEFINITIONS)', re.DOTALL | re.MULTILINE
+    ],
+}
+
+# Find the groups of line rules which may apply to a line in a single scan: group i + 1 matches the i-th literals.
+# Most lines contain none of them, and are left untouched without running any rule.
+LINE_TRIGGERS = re.compile("|".join(f"({triggers})" for triggers in LINE_REPLACEMENTS))
+LINE_RULES: list[list[Rule]] = list(LINE_REPLACEMENTS.values())
+
+# Rules applied within the body of a block, between its header and its END statement.
+# Scoping the rules to their block avoids scanning the whole design from each match.
+BLOCK_REPLACEMENTS: dict[str, list[Rule]] = {
+    "VIAS": [
+        (  # Fix bad VIA LAYER definitions
+            re.compile(r"LAYER (\w++) RECT"),
+            r"RECT \1",
+            False,
         ),
-        r"\1\2 \3\4",  # Remove quotes around property names in PROPERTYDEFINITIONS
-    ),
-    (
-        re.compile(r"\bR0\b"),
-        "N",
-    ),
-    (
-        re.compile(r"\bR180\b"),
-        "S",
-    ),
-    (
-        re.compile(r"\bR90\b"),
-        "W",
-    ),
-    (
-        re.compile(r"\bR180\b"),
-        "E",
-    ),
-    (
-        re.compile(r"\bMY\b"),
-        "FN",
-    ),
-    (
-        re.compile(r"\bMX\b"),
-        "FS",
-    ),
-    (
-        re.compile(r"\bMX90\b"),
-        "FW",
-    ),
-    (
-        re.compile(r"\bMY90\b"),
-        "FE",
-    ),
-    (
-        re.compile(r"^(\s*NETS.*)\+\s*PIN\s+\w+(.*END NETS)", re.DOTALL | re.MULTILINE),
-        r"\1 \2",  # Remove wrong PIN definition in NETS
+        (  # Add the missing semicolon at the end of VIA definitions
+            re.compile(r"^(\s*-[\w \t()]*)$(?=\s*(?:-|\Z))", re.MULTILINE),
+            r"\1 ; ",
+            False,
+        ),
+    ],
+    "PINS": [
+        (
+            re.compile(r"^(\s*+)(LAYER|PORT)", re.MULTILINE),
+            r"\1+ \2",  # Add a '+' before LAYER or PORT in PINS
+            False,
+        ),
+        (
+            re.compile(r"LAYER\s++(\w++)\s++RECT"),
+            r"LAYER \1",  # Remove LAYER xxx RECT from PINS
+            False,
+        ),
+        (
+            re.compile(r"(PLACED|FIXED|COVER)\s++(\d++)\s++(\d++)(?=\s+\w)"),
+            r"\1 ( \2 \3 )",  # Add parentheses around the location of PINS
+            False,
+        ),
+    ],
+    "COMPONENTS": [
+        (
+            re.compile(r"(PLACED|FIXED|COVER)\s++(\d++)\s++(\d++)(?=\s+\w)"),
+            r"\1 ( \2 \3 )",  # Add parentheses around the location of COMPONENTS
+            False,
+        ),
+    ],
+    "SPECIALNETS": [
+        (
+            re.compile(r"WIDTH"),
+            "",  # Remove WIDTH from SPECIALNETS
+            False,
+        ),
+    ],
+    "NETS": [
+        (
+            re.compile(r"WIDTH(?:\s++\d++)?"),
+            "",  # Remove WIDTH from NETS
+            False,
+        ),
+        (
+            re.compile(r"(COVER|FIXED|ROUTED|NOSHIELD|NEW)\s++(\w++)(?:\s++\d++)+"),
+            r"\1 \2 ",  # Remove incorrect width specification in NETS
+            False,
+        ),
+        (
+            re.compile(r"\+\s*+PIN\s++\w++"),
+            " ",  # Remove wrong PIN definition in NETS
+            False,
+        ),
+    ],
+    "PROPERTYDEFINITIONS": [
+        (
+            re.compile(r'^(\s*+\w++)\s++"(\w++)"?', re.MULTILINE),
+            r"\1 \2",  # Remove quotes around property names in PROPERTYDEFINITIONS
+            False,
+        ),
+    ],
+}
+
+# A block with rules, from its header line to its END statement, which is left out of the match.
+BLOCK_SECTION = re.compile(
+    rf"^(?P<header>[ \t]*+(?P<block>{'|'.join(BLOCK_REPLACEMENTS)})\b[^\n]*+\n)"
+    r"(?P<body>.*?)(?=^[ \t]*+END[ \t]++(?P=block)\b)",
+    re.DOTALL | re.MULTILINE,
+)
+
+# Rules applied to the whole code, after the block rules.
+REPLACEMENTS: list[Rule] = [
+    (  # Replace LEF-style orientations with their DEF equivalent
+        re.compile(rf"\b({ORIENTATION_RE})\b"),
+        lambda match: ORIENTATIONS[match.group(1)],
+        False,
     ),
-    (re.compile(r"(^\s*VIAS.*^\s*-[\w\s()]*)$(\s*(?:-.*)?END VIAS)", re.DOTALL | re.MULTILINE), r"\1 ; \2"),
     (
         re.compile(r"\b([()])"),
         r" \1",  # Add space before parentheses
+        False,
     ),
     (
         re.compile(r"([()])\b"),
         r"\1 ",  # Add space before parentheses
-    ),
-    (
-        re.compile(
-            rf"^\s*({BLOCK_RE})(?!.*END \1)(.*^\s*(?={BLOCK_RE}))",
-            re.DOTALL | re.MULTILINE,
-        ),
-        r"\1\2END \1\n",
+        False,
     ),
 ]
 
+BLOCK_START = re.compile(rf"^\s*({BLOCK_RE})\b")
+
+
+def _close_unclosed_blocks(code: str) -> str:
+    """Add the missing END statement of blocks followed by another block.
+
+    This is done in a single pass over the lines, keeping track of the currently open block.
+
+    Args:
+        code (str): The DEF code to be fixed.
+
+    Returns:
+        str: The DEF code with every block closed before the next one starts.
+    """
+    lines: list[str] = []
+    open_block: str | None = None
+
+    for line in code.splitlines(keepends=True):
+        if open_block is not None and line.lstrip().startswith(f"END {open_block}"):
+            open_block = None
+        elif match := BLOCK_START.match(line):
+            if open_block is not None:
+                lines.append(f"END {open_block}\n")
+            open_block = match.group(1)
+
+        lines.append(line)
+
+    return "".join(lines)
+
+
+def _apply_rules(code: str, rules: list[Rule]) -> str:
+    """Apply rules to some DEF code, in order.
+
+    Args:
+        code (str): The DEF code to be fixed.
+        rules (list[Rule]): The rules to apply.
+
+    Returns:
+        str: The DEF code with the rules applied.
+    """
+    for pattern, replacement, fixpoint in rules:
+        if fixpoint:
+            subs = 1
+            while subs:
+                code, subs = pattern.subn(replacement, code)
+        else:
+            code = pattern.sub(replacement, code)
+
+    return code
+
+
+def _fix_lines(code: str) -> str:
+    """Apply the rules only applying within a single line, in a single pass over the lines.
+
+    Args:
+        code (str): The DEF code to be fixed.
+
+    Returns:
+        str: The DEF code with comments, MUSTJOIN nets and the line rules fixed.
+    """
+    lines: list[str] = []
+
+    for raw_line in code.split("\n"):
+        line = raw_line.partition("#")[0]  # Remove comments
+
+        if "MUSTJOIN" in line:  # Remove any MUSTJOIN net
+            continue
+
+        triggered = {match.lastindex for match in LINE_TRIGGERS.finditer(line)}
+        for index, rules in enumerate(LINE_RULES, start=1):
+            if index in triggered:
+                line = _apply_rules(line, rules)
+
+        lines.append(line)
+
+    return "\n".join(lines)
+
+
+def _fix_units(match: re.Match[str]) -> str:
+    """Collapse a UNITS statement into a single DEF line, removing its END statement.
+
+    Args:
+        match (re.Match[str]): The match of the statement, as found by UNITS_SECTION.
+
+    Returns:
+        str: The fixed UNITS statement.
+    """
+    return _apply_rules(f"UNITS{match['body']}", [UNITS_RULE])
+
+
+def _fix_block(match: re.Match[str]) -> str:
+    """Apply the rules of a block to its body.
+
+    Args:
+        match (re.Match[str]): The match of the block, as found by BLOCK_SECTION.
+
+    Returns:
+        str: The header and the fixed body of the block.
+    """
+    return match["header"] + _apply_rules(match["body"], BLOCK_REPLACEMENTS[match["block"]])
+
 
 def fix_def(code: str) -> str:
     """Fix the generated DEF design.
@@ -142,9 +284,9 @@ def fix_def(code: str) -> str:
     Returns:
         str: The fixed DEF code.
     """
-    for pattern, replacement in REPLACEMENTS:
-        subs = 1
-        while subs:
-            code, subs = pattern.subn(replacement, code)
+    code = UNITS_SECTION.sub(_fix_units, code)
+    code = _fix_lines(code)
+    code = BLOCK_SECTION.sub(_fix_block, code)
+    code = _apply_rules(code, REPLACEMENTS)
 
-    return code
+    return _close_unclosed_blocks(code)
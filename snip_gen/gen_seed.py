@@ -1,64 +1,71 @@
 """Generate a seed."""
 
 import argparse
+import asyncio
 import json
 import logging
 import re
 import sys
-import tempfile
 import typing as t
+from functools import partial
 from pathlib import Path
 
 from snip_gen import (
+    BASE_WAIT,
+    CACHE_DIR,
     COVERAGE_MAX,
     DEFAULT_COVERAGE,
     DEFAULT_FILE_EXTENSION,
+    LLM_TIMEOUT,
+    MAX_ATTEMPTS,
+    MAX_CONCURRENT_REQUESTS,
     MAX_FILE_SIZE_BYTES,
     MAX_FILENAME_LENGTH,
+    MAX_OUTPUT_TOKENS,
     MODELS,
 )
 from snip_gen.analyze_coverage import find_low_coverage_from_json
 from snip_gen.gen_snippet import CodeGeneratorAgent
-from snip_gen.typehints import SeedGenArgs, load_coverage
+from snip_gen.typehints import SeedGenArgs, iter_coverage
+from snip_gen.verify_code import find_missing_files
 
 if t.TYPE_CHECKING:
-    from snip_gen.typehints import Coverage, LowCoverageFiles
+    from snip_gen.typehints import CoverageItems, LowCoverageFiles
 
 logger = logging.getLogger(__name__)
 
+# Characters that are not letters, numbers, or hyphens
+NON_FILENAME_CHARACTERS = re.compile(r"[^\w-]")
+REPEATED_UNDERSCORES = re.compile(r"_{2,}")
 
-def extract_function_code(file_content: str, start_line: int) -> str | None:
+
+def extract_function_code(lines: list[str], start_line: int) -> str | None:
     """Extract the code for a function from file content based on start line and indentation.
 
     Args:
-        file_content (str): The content of the file as a string.
+        lines (list[str]): The lines of the file, as returned by `str.splitlines`.
         start_line (int): The line number where the function starts (1-based index).
 
     Returns:
         str | None: The extracted function code as a string, or None if extraction fails.
     """
-    lines = file_content.splitlines()
     if start_line < 1 or start_line > len(lines):
         return None
 
     start_index = start_line - 1
     start_line_text = lines[start_index]
-    match = re.match(r"^(\s*)", start_line_text)
-    if not match:
-        return None
-    base_indent = len(match.group(1))
-
-    extracted_lines = [start_line_text]
-    for i in range(start_index + 1, len(lines)):
-        line = lines[i]
-        # Get indentation of the current line
-        match = re.match(r"^(\s*)", line)
-        indent = len(match.group(1)) if match else 0
+    base_indent = len(start_line_text) - len(start_line_text.lstrip())
+
+    end_index = start_index + 1
+    while end_index < len(lines):
+        line = lines[end_index]
+        stripped = line.lstrip()
         # Stop if indentation is less than base_indent and line is not empty
-        if indent < base_indent and line.strip():
+        if stripped and len(line) - len(stripped) < base_indent:
             break
-        extracted_lines.append(line)
-    return "\n".join(extracted_lines)
+        end_index += 1
+
+    return "\n".join(lines[start_index:end_index])
 
 
 def sanitize_filename(name: str) -> str:
@@ -71,101 +78,228 @@ def sanitize_filename(name: str) -> str:
         str: A sanitized version of the string suitable for use as a filename.
     """
     # Replace characters that are not letters, numbers, or hyphens with underscores
-    s = re.sub(r"[^\w-]", "_", name)
+    s = NON_FILENAME_CHARACTERS.sub("_", name)
     # Collapse multiple underscores into one
-    s = re.sub(r"_{2,}", "_", s)
+    s = REPEATED_UNDERSCORES.sub("_", s)
     # Truncate if too long (optional, but good practice)
-    if len(s) > MAX_FILENAME_LENGTH:
-        s = s[:MAX_FILENAME_LENGTH]
-    return s
+    return s[:MAX_FILENAME_LENGTH]
+
+
+def run_concurrently(jobs: list[t.Callable[[], t.Awaitable[bool]]], max_concurrent: int) -> tuple[int, int]:
+    """Run independent generation jobs concurrently.
+
+    Generation is dominated by the latency of the LLM, so jobs are run on a single event loop,
+    with at most `max_concurrent` of them running at the same time.
+
+    Args:
+        jobs (list[Callable[[], Awaitable[bool]]]): The jobs to run, returning whether the generation succeeded.
+        max_concurrent (int): Maximum number of jobs running at the same time.
+
+    Returns:
+        tuple[int, int]: A tuple containing the number of successful and failed jobs.
+    """
+
+    async def run_job(semaphore: asyncio.Semaphore, job: t.Callable[[], t.Awaitable[bool]]) -> bool:
+        async with semaphore:
+            return await job()
+
+    async def run_all() -> list[bool]:
+        semaphore = asyncio.Semaphore(max_concurrent)
+        return await asyncio.gather(*(run_job(semaphore, job) for job in jobs))
+
+    if not jobs:
+        return 0, 0
+
+    results = asyncio.run(run_all())
+
+    return results.count(True), results.count(False)
+
+
+async def generate_function(  # noqa: PLR0913, PLR0917
+    args: SeedGenArgs,
+    agent: CodeGeneratorAgent,
+    file: Path,
+    function_name: str,
+    function_code: str,
+    output_file: Path,
+) -> bool:
+    """Generate code for a single function.
+
+    Args:
+        args (SeedGenArgs): The arguments for seed generation.
+        agent (CodeGeneratorAgent): The code generator agent to use.
+        file (Path): The file containing the function.
+        function_name (str): The name of the function.
+        function_code (str): The code of the function.
+        output_file (Path): The path where the generated file will be saved.
+
+    Returns:
+        bool: Whether the generation succeeded.
+    """
+    logger.info("Attempting to generate code for function '%s' in '%s' -> '%s'", function_name, file, output_file)
+
+    generated_code = await agent.agenerate_code(
+        file,
+        args.library,
+        output_file,
+        output_file,
+        {},
+        target_content=function_code,
+    )
+
+    if generated_code:
+        logger.info(
+            "Successfully generated and verified design for function '%s'. Saved to '%s'.", function_name, output_file
+        )
+    else:
+        logger.error(
+            "Failed to generate a design for function '%s' after %d attempts.", function_name, args.max_retries + 1
+        )
+    logger.info("--- Finished processing function %s ---", function_name)
+
+    return bool(generated_code)
+
+
+def select_pending_functions(
+    args: SeedGenArgs,
+    file: Path,
+    functions: list[tuple[str, int]],
+    scheduled: set[Path],
+) -> list[tuple[str, int, Path]]:
+    """Compute the output files of functions, and keep those which have not been generated yet.
+
+    Args:
+        args (SeedGenArgs): The arguments for seed generation.
+        file (Path): The file containing the functions.
+        functions (list[tuple[str, int]]): The name and start line of the functions.
+        scheduled (set[Path]): The output files already scheduled for generation, updated in place.
 
+    Returns:
+        list[tuple[str, int, Path]]: The name, start line and output file of the functions to generate.
+    """
+    pending_functions = []
+    for function_name, start_line in functions:
+        # Sanitize function name for filename
+        sanitized_function_name = sanitize_filename(function_name)
+
+        output_file = args.output_dir / f"{file.stem}_{sanitized_function_name}{args.extension}"
+
+        if output_file.exists() or output_file in scheduled:
+            logger.warning("Output file '%s' already exists. Skipping generation for this function.", output_file)
+            continue
 
-def handle_function(args: SeedGenArgs, agent: CodeGeneratorAgent, coverage_data: "Coverage") -> tuple[int, int]:
+        scheduled.add(output_file)
+        pending_functions.append((function_name, start_line, output_file))
+
+    return pending_functions
+
+
+def handle_function(args: SeedGenArgs, agent: CodeGeneratorAgent, coverage_data: "CoverageItems") -> tuple[int, int]:
     """Generate code for functions with zero coverage based on the provided coverage data.
 
     Args:
         args (SeedGenArgs): The arguments for seed generation.
         agent (CodeGeneratorAgent): The code generator agent to use.
-        coverage_data (Coverage): The coverage data loaded from the fastcov JSON file.
+        coverage_data (CoverageItems): The coverage data loaded from the fastcov JSON file.
 
     Returns:
         tuple[int, int]: A tuple containing the number of successful and failed generation attempts.
     """
-    success = 0
     failure = 0
 
     logger.info("Analyzing coverage data for zero-coverage functions...")
 
-    targeted_functions = []
-    for file_path, coverage_info in coverage_data.items():
+    # Functions are grouped by file, so that each file is only read once.
+    targeted_functions: dict[Path, list[tuple[str, int]]] = {}
+    for file_path, coverage_info in coverage_data:
         file = Path(file_path)
 
-        if not file.exists():
-            logger.error(f"Target file '{file}' not found. Skipping.")
-            continue
-
-        for function_name, function_coverage_info in coverage_info["functions"].items():
-            if function_coverage_info["execution_count"] == 0:
-                targeted_functions.append((file, function_name, function_coverage_info["start_line"]))
-
-    if not targeted_functions:
+        functions = [
+            (function_name, function_coverage_info.start_line)
+            for function_name, function_coverage_info in coverage_info.functions.items()
+            if function_coverage_info.execution_count == 0
+        ]
+        if functions:
+            targeted_functions.setdefault(file, []).extend(functions)
+
+    # Only the files with zero-coverage functions are looked for, listing each directory once.
+    for file in find_missing_files(list(targeted_functions)):
+        logger.error("Target file '%s' not found. Skipping.", file)
+        del targeted_functions[file]
+
+    function_count = sum(len(functions) for functions in targeted_functions.values())
+    if not function_count:
         logger.info("No zero-coverage functions found in the coverage report.")
         return 0, 0
 
-    logger.info(f"Found {len(targeted_functions)} zero-coverage functions. Attempting to generate files...")
+    logger.info(f"Found {function_count} zero-coverage functions. Attempting to generate files...")
 
-    for file, function_name, start_line in targeted_functions:
-        logger.info(f"\n--- Processing function: {function_name} in {file} ---")
+    jobs: list[t.Callable[[], t.Awaitable[bool]]] = []
+    scheduled: set[Path] = set()
+
+    for file, functions in targeted_functions.items():
+        # Skip the functions that were already generated before doing any work on the file.
+        pending_functions = select_pending_functions(args, file, functions, scheduled)
+        if not pending_functions:
+            continue
 
         with file.open(encoding="utf-8") as f:
-            file_content = f.read()
+            lines = f.read().splitlines()
 
-        # Extract the function code based on the found line number
-        function_code = extract_function_code(file_content, start_line)
+        for function_name, start_line, output_file in pending_functions:
+            logger.info("\n--- Processing function: %s in %s ---", function_name, file)
 
-        if function_code is None:
-            logger.error(f"Failed to extract code snippet for function '{function_name}' in '{file}'. Skipping.")
-            failure += 1
-            continue
+            # Extract the function code based on the found line number
+            function_code = extract_function_code(lines, start_line)
 
-        # Sanitize function name for filename
-        sanitized_function_name = sanitize_filename(function_name)
+            if function_code is None:
+                logger.error("Failed to extract code snippet for function '%s' in '%s'. Skipping.", function_name, file)
+                failure += 1
+                continue
 
-        output_file = args.output_dir / f"{file.stem}_{sanitized_function_name}{args.extension}"
+            jobs.append(partial(generate_function, args, agent, file, function_name, function_code, output_file))
 
-        if output_file.exists():
-            logger.warning(f"Output file '{output_file}' already exists. Skipping generation for this function.")
-            continue
+    success, job_failure = run_concurrently(jobs, args.max_concurrent)
 
-        logger.info(f"Attempting to generate code for function '{function_name}' -> '{output_file}'")
-        logger.info("Writing extracted snippet to temporary file")
-        with tempfile.NamedTemporaryFile(encoding="utf-8", mode="w+", delete_on_close=False) as f:
-            f.write(function_code)
-            f.close()
+    return success, failure + job_failure
 
-            logger.info("Calling agent with temporary snippet file")
 
-            generated_code = agent.generate_code(
-                Path(f.name),
-                args.library,
-                output_file,
-                output_file,
-                {},
-            )
+async def generate_file(  # noqa: PLR0913, PLR0917
+    args: SeedGenArgs,
+    agent: CodeGeneratorAgent,
+    file_path: Path,
+    output_file: Path,
+    final_file: Path,
+    coverage: dict[int, int],
+) -> bool:
+    """Generate code for a single file.
 
-        if generated_code:
-            logger.info(
-                f"Successfully generated and verified design for function '{function_name}'. Saved to '{output_file}'."
-            )
-            success += 1
-        else:
-            logger.error(
-                f"Failed to generate a design for function '{function_name}' after {args.max_retries + 1} attempts."
-            )
-            failure += 1
-        logger.info(f"--- Finished processing function {function_name} ---")
+    Args:
+        args (SeedGenArgs): The arguments for seed generation.
+        agent (CodeGeneratorAgent): The code generator agent to use.
+        file_path (Path): The file to generate code for.
+        output_file (Path): The path where the generated files will be saved.
+        final_file (Path): The path where the final valid file will be saved.
+        coverage (dict[int, int]): Line coverage of the file.
 
-    return success, failure
+    Returns:
+        bool: Whether the generation succeeded.
+    """
+    logger.info("Attempting to generate design for '%s' -> '%s' -> '%s'", file_path, output_file, final_file)
+
+    generated_code = await agent.agenerate_code(
+        file_path,
+        args.library,
+        output_file,
+        final_file,
+        coverage,
+    )
+    if generated_code:
+        logger.info("Successfully generated valid design for '%s'. Saved to '%s'.", file_path, final_file)
+    else:
+        logger.error("Failed to generate a design for '%s' after %d attempts.", file_path, args.max_retries + 1)
+
+    return bool(generated_code)
 
 
 def generate_files(
@@ -181,57 +315,56 @@ def generate_files(
     Returns:
         tuple[int, int]: A tuple containing the number of successful and failed generation attempts.
     """
-    success = 0
     failure = 0
 
+    jobs: list[t.Callable[[], t.Awaitable[bool]]] = []
+    scheduled: set[Path] = set()
+
     for file_path, coverage_percent, coverage_details in low_coverage_files:
-        logger.info(f"\n--- Processing file: {file_path} (Coverage: {coverage_percent:.2f}%) ---")
+        logger.info("\n--- Processing file: %s (Coverage: %.2f%%) ---", file_path, coverage_percent)
 
-        if not file_path.exists():
-            logger.error(f"Target file '{file_path}' not found. Skipping.")
+        output_file = args.output_dir / file_path.with_suffix(args.extension).name
+        final_file = args.final_output_dir / file_path.with_suffix(args.extension).name
+
+        if final_file.exists() or final_file in scheduled:
+            logger.warning("Final file '%s' already exists. Skipping generation for this file.", final_file)
+            continue
+
+        # A single stat both checks that the file exists and gives its size.
+        try:
+            file_size: int | None = file_path.stat().st_size
+        except FileNotFoundError:
+            file_size = None
+
+        if file_size is None:
+            logger.error("Target file '%s' not found. Skipping.", file_path)
             failure += 1
             continue
 
-        if file_path.stat().st_size > MAX_FILE_SIZE_BYTES:
+        if file_size > MAX_FILE_SIZE_BYTES:
             logger.error(
-                f"File '{file_path}' exceeds the maximum size of {MAX_FILE_SIZE_BYTES / 1024:.2f} KB. "
-                "Skipping generation for this file."
+                "File '%s' exceeds the maximum size of %.2f KB. Skipping generation for this file.",
+                file_path,
+                MAX_FILE_SIZE_BYTES / 1024,
             )
             failure += 1
             continue
 
-        output_file = args.output_dir / file_path.with_suffix(args.extension).name
-        final_file = args.final_output_dir / file_path.with_suffix(args.extension).name
+        scheduled.add(final_file)
+        jobs.append(partial(generate_file, args, agent, file_path, output_file, final_file, coverage_details.lines))
 
-        if final_file.exists():
-            logger.warning(f"Final file '{final_file}' already exists. Skipping generation for this file.")
-            continue
+    success, job_failure = run_concurrently(jobs, args.max_concurrent)
 
-        logger.info(f"Attempting to generate design for '{file_path}' -> '{output_file}' -> '{final_file}'")
+    return success, failure + job_failure
 
-        generated_code = agent.generate_code(
-            file_path,
-            args.library,
-            output_file,
-            final_file,
-            coverage_details["lines"],
-        )
-        if generated_code:
-            logger.info(f"Successfully generated valid design for '{file_path}'. Saved to '{final_file}'.")
-            success += 1
-        else:
-            logger.error(f"Failed to generate a design for '{file_path}' after {args.max_retries + 1} attempts.")
-            failure += 1
-    return success, failure
 
-
-def handle_file(args: SeedGenArgs, agent: CodeGeneratorAgent, coverage_data: "Coverage") -> tuple[int, int]:
+def handle_file(args: SeedGenArgs, agent: CodeGeneratorAgent, coverage_data: "CoverageItems") -> tuple[int, int]:
     """Handle generation targeting low-coverage files.
 
     Args:
         args (SeedGenArgs): The arguments for seed generation.
         agent (CodeGeneratorAgent): The code generator agent to use.
-        coverage_data (Coverage): The coverage data loaded from the fastcov JSON file.
+        coverage_data (CoverageItems): The coverage data loaded from the fastcov JSON file.
 
     Returns:
         tuple[int, int]: A tuple containing the number of successful and failed generation attempts.
@@ -300,6 +433,50 @@ def register(parser: argparse.ArgumentParser) -> None:
         default=3,
         help="Maximum number of attempts to fix errors for each snippet (default: 3).",
     )
+    parser.add_argument(
+        "--llm-attempts",
+        type=int,
+        default=MAX_ATTEMPTS,
+        help=f"Maximum number of attempts to invoke the LLM on transient errors (default: {MAX_ATTEMPTS}).",
+    )
+    parser.add_argument(
+        "--llm-base-wait",
+        type=float,
+        default=BASE_WAIT,
+        help=f"Base delay in seconds of the exponential backoff between LLM attempts (default: {BASE_WAIT}).",
+    )
+    parser.add_argument(
+        "--max-output-tokens",
+        type=int,
+        default=MAX_OUTPUT_TOKENS,
+        help=f"Maximum number of tokens generated by a single LLM invocation (default: {MAX_OUTPUT_TOKENS}).",
+    )
+    parser.add_argument(
+        "--llm-timeout",
+        type=float,
+        default=LLM_TIMEOUT,
+        help=f"Maximum duration in seconds of a single LLM invocation (default: {LLM_TIMEOUT}).",
+    )
+    parser.add_argument(
+        "--cache",
+        action="store_true",
+        help=f"Cache the LLM responses in {CACHE_DIR}, and reuse them for identical requests.",
+    )
+    parser.add_argument("--stream", action="store_true", help="Stream the LLM responses while they are generated.")
+    parser.add_argument(
+        "--candidates",
+        type=int,
+        default=1,
+        help="Number of designs generated by each LLM invocation, the first valid one is kept (default: 1).",
+    )
+    parser.add_argument(
+        "--max-concurrent",
+        type=int,
+        help=(
+            "Maximum number of targets processed concurrently "
+            "(default: depends on the rate limits of the model provider)."
+        ),
+    )
     parser.add_argument("--output-dir", required=True, type=Path, help="Directory to save the generated files.")
     parser.add_argument("--final-output-dir", type=Path, help="Directory to save the validated files.")
     parser.add_argument(
@@ -321,6 +498,39 @@ def register(parser: argparse.ArgumentParser) -> None:
     parser.set_defaults(func=main)
 
 
+def validate_llm_args(args: SeedGenArgs) -> bool:
+    """Validate the arguments controlling how the LLM is invoked.
+
+    Args:
+        args (SeedGenArgs): The arguments for seed generation.
+
+    Returns:
+        bool: True if the arguments are valid, False otherwise.
+    """
+    valid = True
+
+    if args.max_concurrent < 1:
+        logger.error("Max-concurrent must be at least 1.")
+        valid = False
+    if args.llm_attempts < 1:
+        logger.error("LLM-attempts must be at least 1.")
+        valid = False
+    if args.llm_base_wait < 0:
+        logger.error("LLM-base-wait must be positive.")
+        valid = False
+    if args.max_output_tokens < 1:
+        logger.error("Max-output-tokens must be at least 1.")
+        valid = False
+    if args.llm_timeout <= 0:
+        logger.error("LLM-timeout must be positive.")
+        valid = False
+    if args.candidates < 1:
+        logger.error("Candidates must be at least 1.")
+        valid = False
+
+    return valid
+
+
 def validate_args(arguments: argparse.Namespace) -> SeedGenArgs | None:
     """Validate arguments.
 
@@ -338,6 +548,18 @@ def validate_args(arguments: argparse.Namespace) -> SeedGenArgs | None:
         final_output_dir=Path(arguments.final_output_dir or arguments.output_dir),
         model=arguments.model,
         max_retries=arguments.max_retries,
+        max_concurrent=(
+            arguments.max_concurrent
+            if arguments.max_concurrent is not None
+            else MAX_CONCURRENT_REQUESTS[arguments.model]
+        ),
+        llm_attempts=arguments.llm_attempts,
+        llm_base_wait=arguments.llm_base_wait,
+        max_output_tokens=arguments.max_output_tokens,
+        llm_timeout=arguments.llm_timeout,
+        cache=arguments.cache,
+        stream=arguments.stream,
+        candidates=arguments.candidates,
         target=arguments.target,
         library=[Path(f) for f in arguments.library or []],
         extension=arguments.extension,
@@ -354,15 +576,16 @@ def validate_args(arguments: argparse.Namespace) -> SeedGenArgs | None:
     if args.min_threshold >= args.threshold:
         logger.error("Min-threshold must be less than threshold.")
         ret_args = None
+    if not validate_llm_args(args):
+        ret_args = None
 
     if not args.fastcov_json.exists():
         logger.error(f"Fastcov JSON file not found: {args.fastcov_json}")
         ret_args = None
 
-    for file in args.library:
-        if not file.exists():
-            logger.error(f"Library file not found: {file}")
-            ret_args = None
+    for file in find_missing_files(args.library):
+        logger.error(f"Library file not found: {file}")
+        ret_args = None
 
     try:
         args.output_dir.mkdir(parents=True, exist_ok=True)
@@ -386,12 +609,23 @@ def main(arguments: argparse.Namespace) -> None:
         sys.exit(1)
 
     try:
-        coverage_data: Coverage = load_coverage(args.fastcov_json)
+        coverage_data: CoverageItems = iter_coverage(args.fastcov_json)
     except json.JSONDecodeError:
         logger.critical(f"Error decoding JSON from {args.fastcov_json}. Is it a valid JSON file?")
         sys.exit(1)
 
-    agent = CodeGeneratorAgent(model_type=args.model, max_retries=args.max_retries)
+    agent = CodeGeneratorAgent(
+        model_type=args.model,
+        max_retries=args.max_retries,
+        max_attempts=args.llm_attempts,
+        base_wait=args.llm_base_wait,
+        max_connections=args.max_concurrent,
+        max_output_tokens=args.max_output_tokens,
+        llm_timeout=args.llm_timeout,
+        cache=args.cache,
+        stream=args.stream,
+        candidates=args.candidates,
+    )
 
     if args.target == "file":
         success, failure = handle_file(args, agent, coverage_data)
@@ -402,15 +636,20 @@ def main(arguments: argparse.Namespace) -> None:
 
     logger.info(f"Succeeded in generating {success} designs.")
     logger.info(f"Failed to generate {failure} designs.")
-    logger.info(f"Success rate: {success / (success + failure) * 100:.2f}%")
+    if success + failure:
+        logger.info(f"Success rate: {success / (success + failure) * 100:.2f}%")
     logger.info("--------------------------")
 
     sys.exit(1 if failure else 0)
 
 
 if __name__ == "__main__":
+    from snip_gen.__main__ import configure_logging
+
     _parser = argparse.ArgumentParser(description="Generate designs for files or functions with low code coverage.")
 
     register(_parser)
 
-    main(_parser.parse_args())
+    _args = _parser.parse_args()
+    configure_logging()
+    main(_args)
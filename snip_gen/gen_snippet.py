@@ -1,23 +1,23 @@
 """Generate code snippets."""
 
 import argparse
+import asyncio
 import logging
 import sys
 import typing as t
 from pathlib import Path
-from shutil import copy2
 
-from snip_gen import MODELS
+from snip_gen import BASE_WAIT, CACHE_DIR, LLM_TIMEOUT, MAX_ATTEMPTS, MAX_OUTPUT_TOKENS, MODELS
+from snip_gen.cache import DiskCache
 from snip_gen.fix import fix_code
 from snip_gen.llm_handler import LLMHandler
 from snip_gen.prompts import get_feedback_prompt, get_initial_prompt, get_system_prompts
 from snip_gen.typehints import SnippetGenArgs
-from snip_gen.verify_code import verify_code, write_code
+from snip_gen.verify_code import find_missing_files, verify_source_batch, write_code
 
 if t.TYPE_CHECKING:
     from snip_gen import MODEL_HINT
 
-logging.basicConfig(level=logging.INFO, format="%(levelname)s - %(message)s")
 logger = logging.getLogger(__name__)
 
 
@@ -31,37 +31,73 @@ class CodeGeneratorAgent:
         max_retries (int): Maximum number of attempts to fix linting errors.
     """
 
-    def __init__(self, model_type: "MODEL_HINT", max_retries: int = 3) -> None:
+    def __init__(  # noqa: PLR0913
+        self,
+        model_type: "MODEL_HINT",
+        max_retries: int = 3,
+        *,
+        max_attempts: int = MAX_ATTEMPTS,
+        base_wait: float = BASE_WAIT,
+        max_connections: int | None = None,
+        max_output_tokens: int = MAX_OUTPUT_TOKENS,
+        llm_timeout: float = LLM_TIMEOUT,
+        cache: bool = False,
+        stream: bool = False,
+        candidates: int = 1,
+    ) -> None:
         """Initialize the CodeGeneratorAgent.
 
         Args:
             model_type (str): The type of language model to use.
             max_retries (int): Maximum number of attempts to fix linting errors.
+            max_attempts (int): Maximum number of attempts to invoke the LLM before giving up.
+            base_wait (float): Base of the exponential backoff in seconds when invoking the LLM.
+            max_connections (int | None): Size of the connection pool shared by the LLM invocations.
+            max_output_tokens (int): Maximum number of tokens generated by a single LLM invocation.
+            llm_timeout (float): Maximum duration of a single LLM invocation in seconds.
+            cache (bool): Whether to cache the LLM responses on disk.
+            stream (bool): Whether to stream the LLM responses.
+            candidates (int): Number of designs generated by each LLM invocation.
+                The first valid one is kept.
 
         Raises:
             ValueError: If writing to the file fails.
         """
         try:
-            self.llm_handler = LLMHandler(model_type=model_type)
+            self.llm_handler = LLMHandler(
+                model_type=model_type,
+                max_attempts=max_attempts,
+                base_wait=base_wait,
+                max_connections=max_connections,
+                max_output_tokens=max_output_tokens,
+                timeout=llm_timeout,
+                cache=DiskCache() if cache else None,
+                stream=stream,
+                candidates=candidates,
+            )
         except ValueError as e:
             msg = "Failed to initialize LLMHandler"
             raise ValueError(msg) from e
 
         self.max_retries = max_retries
 
-        logger.debug(f"Max retries for fixing lint errors: {self.max_retries}")
+        logger.debug("Max retries for fixing lint errors: %d", self.max_retries)
 
-    def generate_code(
+    async def agenerate_code(  # noqa: PLR0913
         self,
         target_file: Path,
         library: list[Path],
         output_file: Path,
         final_file: Path,
         coverage: dict[int, int],
+        *,
+        target_content: str | None = None,
     ) -> str | None:
         """Generate and refine code until it passes linting.
 
         This is guided by the content of the target file.
+        The LLM is invoked asynchronously, and the verification runs in a thread,
+        so that several targets can be generated concurrently.
 
         Args:
             target_file (Path): The path to the target file to maximize coverage for.
@@ -69,71 +105,74 @@ class CodeGeneratorAgent:
             output_file (Path): The path where the generated files will be saved.
             final_file (Path): The path where the final valid file will be saved.
             coverage (dict[int, int]): Coverage data to be used in the generation process.
+            target_content (str | None): The code to maximize coverage for, such as an excerpt of the target file.
+                If None, the whole target file is read.
 
         Returns:
             str | None: The generated code if successful, otherwise None.
         """
         target_filename = target_file.name
 
-        try:
-            with target_file.open(encoding="utf-8") as f:
-                target_content = f.read()
-        except (OSError, FileNotFoundError):
-            logger.exception(f"Failed to read target file: {target_filename}")
-            return None
+        if target_content is None:
+            try:
+                target_content = target_file.read_bytes().decode("utf-8")
+            except (OSError, FileNotFoundError):
+                logger.exception("Failed to read target file: %s", target_filename)
+                return None
 
         system_prompts = get_system_prompts(target_filename, target_content, str(coverage), library)
+        # The system messages are the same for every attempt, only the user messages change.
+        system_messages = self.llm_handler.prepare_system_messages(*system_prompts)
 
         initial_prompt = get_initial_prompt(target_filename, target_content, str(coverage), library)
 
-        current_prompt = initial_prompt
+        # The feedback is sent after the initial prompt, keeping the start of the conversation unchanged.
+        current_prompts = [initial_prompt]
 
-        no_file = []
+        # The designs are verified in memory: only the final design, or the failed ones, are written to disk.
+        failed_files = [
+            output_file.with_suffix(f".failed.{attempt}{output_file.suffix}") for attempt in range(self.max_retries + 1)
+        ]
+        failed_attempts: list[tuple[Path, str]] = []
 
         for attempt in range(self.max_retries + 1):
-            current_file = output_file.with_suffix(f".{attempt}{output_file.suffix}")
-
-            logger.info(f"--- Attempt {attempt + 1} of {self.max_retries + 1} ---")
+            logger.info("--- Attempt %d of %d ---", attempt + 1, self.max_retries + 1)
 
             logger.info("Requesting code from LLM...")
-            generated_code = self.llm_handler.invoke_llm(current_prompt, *system_prompts)
+            generated_codes = await self.llm_handler.ainvoke_llm(current_prompts, system_messages)
 
-            if not generated_code.strip():
-                no_file.append(attempt)
+            if not generated_codes:
                 logger.warning("LLM returned empty code. Retrying with initial prompt.")
-                current_prompt = initial_prompt
+                current_prompts = [initial_prompt]
                 continue
 
             logger.info("Fixing the generated code...")
-            fixed_code = fix_code(generated_code)
+            fixed_codes = [fix_code(generated_code) for generated_code in generated_codes]
             logger.info("Verifying the fixed code...")
 
-            write_code(current_file, fixed_code)
-
-            lint_success, lint_stderr = verify_code(current_file, library)
+            # The candidates are verified by a single OpenROAD process, which only reads the library once.
+            results = await asyncio.to_thread(verify_source_batch, fixed_codes, library)
 
-            if lint_success:
-                copy2(current_file, final_file)
-                logger.info(f"Successfully generated and verified file: {final_file}")
-                return fixed_code
+            for fixed_code, (lint_success, _) in zip(fixed_codes, results, strict=True):
+                if lint_success:
+                    write_code(final_file, fixed_code)
+                    logger.info("Successfully generated and verified file: %s", final_file)
+                    return fixed_code
 
-            logger.error(f"Verification failed for {current_file}.")
+            # Only the first candidate is sent back with its errors, and saved if every attempt fails.
+            fixed_code, (_, lint_stderr) = fixed_codes[0], results[0]
+            failed_attempts.append((failed_files[attempt], fixed_code))
+            logger.error("Verification failed for attempt %d.", attempt + 1)
             logger.info("Attempting to fix the lint error...")
-            current_prompt = get_feedback_prompt(
+            feedback_prompt = get_feedback_prompt(
                 target_filename, target_content, str(coverage), library, fixed_code, lint_stderr
             )
+            current_prompts = [initial_prompt, feedback_prompt]
 
-        failure_suffix = f".failed.{{}}{output_file.suffix}"
+        logger.info("Saving the failed designs to %s.", output_file.with_suffix(f".failed.x{output_file.suffix}"))
 
-        logger.info(
-            f"Renaming the output files to indicate failure to {output_file.with_suffix(failure_suffix.format('x'))}."
-        )
-
-        for attempt in range(self.max_retries + 1):
-            if attempt in no_file:
-                continue
-            current_file = output_file.with_suffix(f".{attempt}{output_file.suffix}")
-            current_file.rename(output_file.with_suffix(failure_suffix.format(attempt)))
+        for failed_file, failed_code in failed_attempts:
+            write_code(failed_file, failed_code)
 
         logger.error("Failed to generate a design after all attempts.")
         return None
@@ -147,15 +186,37 @@ def register(parser: argparse.ArgumentParser) -> None:
     """
     parser.add_argument("--model", required=True, choices=MODELS, help="The language model to use.")
     parser.add_argument(
-        "--target", required=True, type=Path, help="The path to the target file within to maximize coverage for."
+        "--target",
+        required=True,
+        nargs="+",
+        type=Path,
+        help="The paths to the target files within to maximize coverage for.",
+    )
+    parser.add_argument(
+        "--output",
+        required=True,
+        nargs="+",
+        type=Path,
+        help="The paths where the generated files will be saved, one for each target.",
     )
-    parser.add_argument("--output", required=True, type=Path, help="The path where the generated file will be saved.")
     parser.add_argument(
         "--library", required=True, nargs="+", type=Path, help="Library files to be included in the generation process."
     )
     parser.add_argument(
         "--max-retries", type=int, default=3, help="Maximum number of attempts to fix linting errors (default: 3)."
     )
+    parser.add_argument(
+        "--cache",
+        action="store_true",
+        help=f"Cache the LLM responses in {CACHE_DIR}, and reuse them for identical requests.",
+    )
+    parser.add_argument("--stream", action="store_true", help="Stream the LLM responses while they are generated.")
+    parser.add_argument(
+        "--candidates",
+        type=int,
+        default=1,
+        help="Number of designs generated by each LLM invocation, the first valid one is kept (default: 1).",
+    )
 
     parser.set_defaults(func=main)
 
@@ -171,25 +232,79 @@ def validate_args(arguments: argparse.Namespace) -> SnippetGenArgs | None:
     """
     args = SnippetGenArgs(
         model=arguments.model,
-        target=Path(arguments.target),
-        output=Path(arguments.output),
+        target=[Path(f) for f in arguments.target],
+        output=[Path(f) for f in arguments.output],
         library=[Path(f) for f in arguments.library or []],
         max_retries=arguments.max_retries,
+        cache=arguments.cache,
+        stream=arguments.stream,
+        candidates=arguments.candidates,
     )
 
     ret_args: SnippetGenArgs | None = args
 
-    if not args.target.exists():
-        logger.error(f"Target file not found: {args.target}. Cannot generate code.")
+    if len(args.target) != len(args.output):
+        logger.error("There must be exactly one output file for each target file.")
+        ret_args = None
+
+    if len(set(args.output)) != len(args.output):
+        logger.error("Output files must be different.")
+        ret_args = None
+
+    if args.candidates < 1:
+        logger.error("Candidates must be at least 1.")
         ret_args = None
 
-    if args.target.resolve() == args.output.resolve():
-        logger.error("Target and output file cannot be the same.")
+    for target in find_missing_files(args.target):
+        logger.error("Target file not found: %s. Cannot generate code.", target)
         ret_args = None
 
+    for file in find_missing_files(args.library):
+        logger.error("Library file not found: %s", file)
+        ret_args = None
+
+    for target, output in zip(args.target, args.output, strict=False):
+        if target.resolve() == output.resolve():
+            logger.error("Target and output file cannot be the same: %s.", target)
+            ret_args = None
+
     return ret_args
 
 
+async def amain(args: SnippetGenArgs) -> bool:
+    """Generate a code snippet for each target concurrently.
+
+    Args:
+        args (SnippetGenArgs): The validated command line arguments.
+
+    Returns:
+        bool: Whether a valid design was generated for every target.
+    """
+    agent = CodeGeneratorAgent(
+        model_type=args.model,
+        max_retries=args.max_retries,
+        cache=args.cache,
+        stream=args.stream,
+        candidates=args.candidates,
+    )
+    results = await asyncio.gather(
+        *(
+            agent.agenerate_code(target, args.library, output, output, {})
+            for target, output in zip(args.target, args.output, strict=True)
+        )
+    )
+
+    success = True
+    for output, successful_code in zip(args.output, results, strict=True):
+        if successful_code:
+            logger.info("Final verified file saved to: %s", output)
+        else:
+            logger.error("Failed to generate a valid design for: %s", output)
+            success = False
+
+    return success
+
+
 def main(arguments: argparse.Namespace) -> None:
     """Generate code snippets.
 
@@ -201,18 +316,8 @@ def main(arguments: argparse.Namespace) -> None:
         logger.error("Invalid arguments provided. Exiting.")
         sys.exit(1)
 
-    agent = CodeGeneratorAgent(model_type=args.model, max_retries=args.max_retries)
-    successful_code = agent.generate_code(
-        args.target,
-        args.library,
-        args.output,
-        args.output,
-        {},
-    )
-
-    if successful_code:
+    if asyncio.run(amain(args)):
         logger.info("--- Successfully generated and verified code ---")
-        logger.info(f"Final verified file saved to: {args.output}")
         logger.info("------------------------------------------------")
         sys.exit(0)
     else:
@@ -223,6 +328,10 @@ def main(arguments: argparse.Namespace) -> None:
 
 
 if __name__ == "__main__":
+    from snip_gen.__main__ import configure_logging
+
     _parser = argparse.ArgumentParser(description="Generate valid code exercise a target file using an LLM.")
     register(_parser)
-    main(_parser.parse_args())
+    _args = _parser.parse_args()
+    configure_logging()
+    main(_args)
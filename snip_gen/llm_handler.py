@@ -1,15 +1,30 @@
 """Handle interactions with LLMs using LiteLLM."""
 
+import asyncio
 import logging
+import random
+import re
 import typing as t
-from time import sleep
-
-from snip_gen import BASE_WAIT, CODEBLOCK_STRIPPED_PREFIX, EXPONENTIAL_FACTOR, LITELLM_MODELS, MAX_ATTEMPTS
+from functools import lru_cache
+
+from snip_gen import (
+    BASE_WAIT,
+    CODEBLOCK_STRIPPED_PREFIX,
+    EXPONENTIAL_FACTOR,
+    LITELLM_MODELS,
+    LLM_TIMEOUT,
+    MAX_ATTEMPTS,
+    MAX_OUTPUT_TOKENS,
+    MAX_WAIT,
+    RATE_LIMITS,
+)
+from snip_gen.rate_limit import RateLimiter
 
 if t.TYPE_CHECKING:
     import litellm
 
     from snip_gen import MODEL_HINT
+    from snip_gen.cache import DiskCache
 else:
     litellm = None
 
@@ -26,25 +41,109 @@ def _ensure_litellm() -> None:
 
 
 # Configure logging
-logging.basicConfig(level=logging.INFO, format="%(levelname)s - %(message)s")
 logger = logging.getLogger(__name__)
 
+# Match the first code block marker at the start of the content, in a single scan.
+CODEBLOCK_PREFIX_RE = re.compile("|".join(map(re.escape, CODEBLOCK_STRIPPED_PREFIX)))
+
 Prompts = list[dict[str, str | dict[str, str]]]
 
 
+@lru_cache(maxsize=256)
+def _count_tokens(model_name: str, text: str) -> int:
+    """Count the tokens of a message content.
+
+    The system prompts and the initial prompt are the same for every attempt,
+    so that they are only tokenized once.
+
+    Args:
+        model_name (str): The name of the model, which determines the tokenizer.
+        text (str): The content of the message.
+
+    Returns:
+        int: The number of tokens of the content.
+    """
+    tokens: int = litellm.token_counter(model=model_name, text=text)
+    return tokens
+
+
+@lru_cache(maxsize=16)
+def _supports_candidates(model_name: str) -> bool:
+    """Check whether the provider of a model generates several candidates in a single request.
+
+    Args:
+        model_name (str): The name of the model, which determines the provider.
+
+    Returns:
+        bool: True if the provider supports the `n` parameter, False otherwise.
+    """
+    return "n" in (litellm.get_supported_openai_params(model=model_name) or ())
+
+
+def _get_retry_after(error: Exception) -> float | None:
+    """Get the delay requested by the provider through the Retry-After header, if any.
+
+    Args:
+        error (Exception): The error raised by LiteLLM.
+
+    Returns:
+        float | None: The requested delay in seconds, or None if the provider did not request one.
+    """
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+
+    try:
+        return max(0.0, float(headers.get("retry-after")))
+    except (TypeError, ValueError):
+        # Missing header, or HTTP-date format which is not worth parsing here.
+        return None
+
+
 class LLMHandler:
     """Handle interaction with different language models using LiteLLM.
 
     Attributes:
         model_name (str): The name of the model to use with LiteLLM.
+        max_attempts (int): Maximum number of attempts to invoke the LLM before giving up.
+        base_wait (float): Base of the exponential backoff in seconds.
+        max_connections (int | None): Size of the connection pool shared by the LLM invocations.
+        max_output_tokens (int): Maximum number of tokens generated by a single invocation.
+        timeout (float): Maximum duration of a single invocation in seconds.
+        cache (DiskCache | None): The cache of the LLM responses, if enabled.
+        stream (bool): Whether the responses are streamed.
+        candidates (int): Number of candidates generated by each invocation.
+        rate_limiter (RateLimiter): Limit the rate of the asynchronous invocations to the limits of the provider.
     """
 
-    def __init__(self, model_type: "MODEL_HINT") -> None:
+    def __init__(  # noqa: PLR0913
+        self,
+        model_type: "MODEL_HINT",
+        *,
+        max_attempts: int = MAX_ATTEMPTS,
+        base_wait: float = BASE_WAIT,
+        max_connections: int | None = None,
+        max_output_tokens: int = MAX_OUTPUT_TOKENS,
+        timeout: float = LLM_TIMEOUT,
+        cache: "DiskCache | None" = None,
+        stream: bool = False,
+        candidates: int = 1,
+    ) -> None:
         """Initialize the LLMHandler with the specified model type.
 
         Args:
             model_type (str): The type of language model provider.
                 This will be used to determine the model string for LiteLLM.
+            max_attempts (int): Maximum number of attempts to invoke the LLM before giving up.
+            base_wait (float): Base of the exponential backoff in seconds.
+            max_connections (int | None): Size of the connection pool shared by the LLM invocations.
+                If None, LiteLLM manages its HTTP clients itself.
+            max_output_tokens (int): Maximum number of tokens generated by a single invocation.
+            timeout (float): Maximum duration of a single invocation in seconds.
+            cache (DiskCache | None): The cache of the LLM responses. If None, responses are not cached.
+            stream (bool): Whether to stream the responses, receiving them while they are generated.
+            candidates (int): Number of candidates generated by each invocation.
+                They share the same prompt, which is only sent and billed once.
 
         Raises:
             ValueError:  If the provided model type is unsupported.
@@ -55,83 +154,334 @@ class LLMHandler:
             raise ValueError(msg)
 
         self.model_name = model_name
+        self.max_attempts = max_attempts
+        self.base_wait = base_wait
+        self.max_connections = max_connections
+        self.max_output_tokens = max_output_tokens
+        self.timeout = timeout
+        self.cache = cache
+        self.stream = stream
+        self.candidates = candidates
+        self.rate_limiter = RateLimiter(*RATE_LIMITS[model_type])
+
+        logger.info("Using model via LiteLLM: %s", self.model_name)
+
+    def _ensure_http_client(self) -> None:
+        """Share a single HTTP client between the LLM invocations, so that connections are kept alive."""
+        if self.max_connections is None:
+            return
+
+        import httpx  # noqa: PLC0415  # Installed along with litellm
+
+        limits = httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections)
 
-        logger.info(f"Using model via LiteLLM: {self.model_name}")
+        if litellm.aclient_session is None:
+            litellm.aclient_session = httpx.AsyncClient(limits=limits)
 
-    def completion(self, messages: Prompts) -> str | None:
-        """Invoke the language model via LiteLLM with the given messages.
+    def retry_delay(self, attempt: int, error: Exception) -> float:
+        """Compute how long to wait before retrying a failed invocation.
 
-        Retries on rate-limit errors with exponential backoff.
+        The delay requested by the provider is honored if present.
+        Otherwise, an exponential backoff is used, capped to MAX_WAIT.
+        The delay is drawn between half and all of the backoff,
+        so that concurrent generations do not retry all at once.
+
+        Args:
+            attempt (int): The index of the failed attempt, starting at 0.
+            error (Exception): The error raised by the failed attempt.
+
+        Returns:
+            float: The delay in seconds.
+        """
+        retry_after = _get_retry_after(error)
+        if retry_after is not None:
+            return retry_after
+
+        backoff: float = self.base_wait * (EXPONENTIAL_FACTOR**attempt)
+
+        delay = min(MAX_WAIT, backoff)
+
+        return random.uniform(delay / 2, delay)  # noqa: S311
+
+    def _completion_kwargs(self, messages: Prompts, candidates: int) -> dict[str, t.Any]:
+        """Build the arguments of a LiteLLM completion.
 
         Args:
             messages: List of message dictionaries containing role and content.
+            candidates (int): The number of candidates generated by the request.
 
         Returns:
-            str | None: The response from the language model.
+            dict[str, Any]: The keyword arguments for `litellm.acompletion`.
         """
-        for attempt in range(MAX_ATTEMPTS):
-            logger.debug(f"Attempt {attempt + 1} to invoke LLM ({self.model_name}) via LiteLLM...")
-            try:
-                response = litellm.completion(model=self.model_name, messages=messages)
-            except litellm.exceptions.RateLimitError:
-                logger.warning(f"Rate limit error on attempt {attempt + 1}")
+        kwargs: dict[str, t.Any] = {
+            "model": self.model_name,
+            "messages": messages,
+            "max_tokens": self.max_output_tokens,
+            "timeout": self.timeout,
+            "stream": self.stream,
+        }
+        if candidates > 1:  # Only sent to the providers supporting it
+            kwargs["n"] = candidates
+
+        return kwargs
+
+    def _next_delay(self, attempt: int, error: Exception) -> float | None:
+        """Log a retryable error and compute the delay before the next attempt.
+
+        Args:
+            attempt (int): The index of the failed attempt, starting at 0.
+            error (Exception): The error raised by the failed attempt.
+
+        Returns:
+            float | None: The delay in seconds, or None if this was the last attempt.
+        """
+        logger.warning("%s on attempt %d", type(error).__name__, attempt + 1)
+
+        if attempt + 1 == self.max_attempts:
+            return None
+
+        delay = self.retry_delay(attempt, error)
+
+        logger.warning("Waiting %.1f seconds before retrying...", delay)
+
+        return delay
+
+    @staticmethod
+    def _response_contents(response: t.Any) -> list[str]:  # noqa: ANN401
+        """Extract the generated candidates from a LiteLLM response.
+
+        Args:
+            response (Any): The response returned by LiteLLM.
 
-                delay = BASE_WAIT * (EXPONENTIAL_FACTOR**attempt)
+        Returns:
+            list[str]: The non-empty generated texts, in the order of the choices.
+        """
+        contents = [
+            choice.message.content
+            for choice in response.choices or ()
+            if choice.message and isinstance(choice.message.content, str) and choice.message.content
+        ]
+
+        if not contents and logger.isEnabledFor(logging.WARNING):
+            logger.warning("Raw response:\n\n%s\n\n", getattr(response, "text", response))
+        return contents
+
+    def _streamed_contents(self, chunks: list[t.Any]) -> list[str]:
+        """Join the chunks of a streamed LiteLLM response into the generated candidates.
+
+        Args:
+            chunks (list[Any]): The chunks returned by LiteLLM.
+
+        Returns:
+            list[str]: The non-empty generated texts, in the order of the choices.
+        """
+        logger.debug("Received %d chunks from %s.", len(chunks), self.model_name)
+
+        parts: dict[int, list[str]] = {}
+        for chunk in chunks:
+            for choice in chunk.choices or ():
+                if choice.delta and isinstance(choice.delta.content, str):
+                    parts.setdefault(choice.index, []).append(choice.delta.content)
+
+        return [content for _, choice_parts in sorted(parts.items()) if (content := "".join(choice_parts))]
+
+    def _cache_parameters(self) -> dict[str, t.Any]:
+        """Build the parameters of a request changing the response of the model, which are part of the cache key.
+
+        Returns:
+            dict[str, Any]: The maximum number of output tokens and the number of candidates.
+        """
+        return {"max_tokens": self.max_output_tokens, "n": self.candidates}
 
-                logger.warning(f"Waiting {delay} seconds before retrying...")
+    def _get_cached(self, messages: Prompts) -> list[str] | None:
+        """Get the cached response to some messages.
 
-                sleep(delay)
+        Args:
+            messages: List of message dictionaries containing role and content.
+
+        Returns:
+            list[str] | None: The cached candidates, or None if caching is disabled or the messages were never sent.
+        """
+        if self.cache is None:
+            return None
+
+        return self.cache.get(self.model_name, messages, self._cache_parameters())
+
+    def _set_cached(self, messages: Prompts, contents: list[str]) -> None:
+        """Cache the response to some messages.
+
+        Responses without any code once cleaned are not cached, so that retrying after them does invoke the LLM again.
+
+        Args:
+            messages: List of message dictionaries containing role and content.
+            contents (list[str]): The candidates generated by the language model.
+        """
+        if self.cache is not None and any(self._clean_content(content) for content in contents):
+            self.cache.set(self.model_name, messages, self._cache_parameters(), contents)
+
+    async def _arequest(self, messages: Prompts, prompt_tokens: int, candidates: int) -> list[str]:
+        """Send a single request to the language model, retrying it on transient errors.
+
+        Args:
+            messages: List of message dictionaries containing role and content.
+            prompt_tokens (int): The number of tokens of the messages, reserved from the rate limiter.
+            candidates (int): The number of candidates generated by the request.
+
+        Returns:
+            list[str]: The candidates generated by the language model, or an empty list if there are none.
+        """
+        for attempt in range(self.max_attempts):
+            logger.debug("Attempt %d to invoke LLM (%s) via LiteLLM...", attempt + 1, self.model_name)
+            await self.rate_limiter.acquire(prompt_tokens)
+            try:
+                response = await litellm.acompletion(**self._completion_kwargs(messages, candidates))
+                if self.stream:
+                    # Errors raised while streaming are retried like the errors of the request itself.
+                    return self._streamed_contents([chunk async for chunk in response])
+                return self._response_contents(response)
+            except (
+                litellm.exceptions.RateLimitError,
+                litellm.exceptions.APIConnectionError,
+                litellm.exceptions.Timeout,
+            ) as e:
+                delay = self._next_delay(attempt, e)
+                if delay is None:
+                    break
+
+                await asyncio.sleep(delay)
             except litellm.exceptions.NotFoundError:
-                logger.exception(f"No model found for {self.model_name}")
+                logger.exception("No model found for %s", self.model_name)
                 raise
-            else:
-                if response.choices and response.choices[0].message:
-                    content = response.choices[0].message.content
-                    if isinstance(content, str):
-                        return content
-
-                raw_answer = getattr(response, "text", str(response))
-                logger.warning(f"Raw response:\n\n{raw_answer}\n\n")
-                return None
 
         logger.warning("Exceeded maximum attempts to invoke LLM.")
-        return None
+        return []
+
+    async def acompletion(self, messages: Prompts) -> list[str]:
+        """Invoke the language model via LiteLLM with the given messages, without blocking the event loop.
 
-    def invoke_llm(self, prompt: str, *system_prompts: str) -> str:
-        """Invoke the language model via LiteLLM with the given prompt.
+        Requests wait for the rate limiter, so that concurrent invocations stay below the limits of the provider.
+        Rate-limit errors, connection errors and timeouts are still retried with exponential backoff.
+        When the provider does not support generating several candidates at once, they are requested one by one.
 
         Args:
-            prompt (str): The main user prompt for the LLM.
-            *system_prompts (str): Optional system messages to guide the LLM’s behavior.
+            messages: List of message dictionaries containing role and content.
 
         Returns:
-            str: The content of the LLM’s response as a string.
+            list[str]: The candidates generated by the language model, or an empty list if there are none.
         """
-        _ensure_litellm()
+        cached = self._get_cached(messages)
+        if cached is not None:
+            return cached
+
+        # Only the prompt is known beforehand: the output tokens are not accounted for.
+        # The few tokens delimiting the messages are not accounted for either.
+        prompt_tokens = sum(
+            _count_tokens(self.model_name, message["content"])
+            for message in messages
+            if isinstance(message["content"], str)
+        )
+
+        if self.candidates == 1 or _supports_candidates(self.model_name):
+            contents = await self._arequest(messages, prompt_tokens, self.candidates)
+        else:
+            logger.debug("%s does not support several candidates, requesting them one by one.", self.model_name)
+            contents = []
+            for _ in range(self.candidates):
+                contents.extend(await self._arequest(messages, prompt_tokens, 1))
+
+        self._set_cached(messages, contents)
+        return contents
+
+    @staticmethod
+    def prepare_system_messages(*system_prompts: str) -> Prompts:
+        """Build the system messages sent to the LLM.
+
+        They are marked as cacheable, being part of the prefix shared by all the attempts.
+        They only need to be built once, then passed to every invocation.
+
+        Args:
+            *system_prompts (str): Optional system messages to guide the LLM’s behavior.
 
-        messages: Prompts = [
+        Returns:
+            Prompts: The system messages.
+        """
+        return [
             {"role": "system", "content": system_prompt, "cache_control": {"type": "ephemeral"}}
             for system_prompt in system_prompts
         ]
 
-        messages.append({"role": "user", "content": prompt})
+    @staticmethod
+    def _build_messages(prompts: list[str], system_messages: Prompts) -> Prompts:
+        """Build the messages sent to the LLM.
 
-        logger.info(f"Invoking LLM ({self.model_name}) via LiteLLM...")
+        The first user message is marked as cacheable, like the system messages:
+        they are the prefix shared by all the attempts, while the following messages change every time.
 
-        content = self.completion(messages)
-        logger.info("LLM invocation complete.")
+        Args:
+            prompts (list[str]): The user prompts for the LLM, sent as successive user messages.
+            system_messages (Prompts): The system messages, as built by `prepare_system_messages`.
 
-        if content:
-            content = content.strip()
+        Returns:
+            Prompts: The system messages, followed by the user messages.
+        """
+        messages: Prompts = system_messages.copy()
 
-            for prefix in CODEBLOCK_STRIPPED_PREFIX:
-                if content.startswith(prefix):
-                    content = content[len(prefix) :].strip()
-                    break
+        for index, prompt in enumerate(prompts):
+            if index == 0:
+                messages.append({"role": "user", "content": prompt, "cache_control": {"type": "ephemeral"}})
+            else:
+                messages.append({"role": "user", "content": prompt})
+
+        return messages
+
+    @staticmethod
+    def _clean_content(content: str) -> str:
+        """Strip the code block markers surrounding the code generated by the LLM.
+
+        Args:
+            content (str): A candidate of the LLM’s response.
+
+        Returns:
+            str: The generated code.
+        """
+        content = content.strip()
+        if match := CODEBLOCK_PREFIX_RE.match(content):
+            content = content[match.end() :].lstrip()
+
+        return content.removesuffix("```").rstrip()
 
-            if content.endswith("```"):
-                content = content[:-3].strip()
-            return content
+    @classmethod
+    def _clean_contents(cls, contents: list[str]) -> list[str]:
+        """Strip the code block markers surrounding each candidate generated by the LLM.
+
+        Args:
+            contents (list[str]): The candidates of the LLM’s response.
+
+        Returns:
+            list[str]: The non-empty generated codes, or an empty list if the response is empty.
+        """
+        codes = [code for content in contents if (code := cls._clean_content(content))]
+
+        if not codes:
+            logger.warning("LLM response did not contain expected content.")
+        return codes
+
+    async def ainvoke_llm(self, prompts: list[str], system_messages: Prompts) -> list[str]:
+        """Invoke the language model via LiteLLM with the given prompts, without blocking the event loop.
+
+        Args:
+            prompts (list[str]): The user prompts for the LLM, sent as successive user messages.
+            system_messages (Prompts): The system messages, as built by `prepare_system_messages`.
+
+        Returns:
+            list[str]: The codes generated by the LLM, one for each non-empty candidate.
+        """
+        _ensure_litellm()
+        self._ensure_http_client()
+
+        logger.info("Invoking LLM (%s) via LiteLLM...", self.model_name)
+
+        contents = await self.acompletion(self._build_messages(prompts, system_messages))
+        logger.info("LLM invocation complete.")
 
-        logger.warning("LLM response did not contain expected content.")
-        return ""
+        return self._clean_contents(contents)
@@ -1,12 +1,21 @@
 """Manage prompts."""
 
 import typing as t
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from string import Formatter
 
 # ruff: noqa: E501, ARG001
 
 if t.TYPE_CHECKING:
     from pathlib import Path
 
+# Maximum number of LEF files read at the same time.
+MAX_READ_WORKERS = 32
+
+# The literal parts of a prompt, each followed by the name of the field inserted after it, if any.
+PromptTemplate = tuple[tuple[str, str | None], ...]
+
 
 _TECHNOLOGY_SYSTEM_PROMPT = """You are an expert chip designer.
 Your task is to generate a chip design in the form of a Design Exchange Format (DEF) file.
@@ -293,7 +302,7 @@ DO NOT ADD ANY COMMENTS OR EXPLANATIONS.
 """
 
 
-_TARGET_SYSTEM_PROMPT = """The goal is to create diverse patterns in the design,
+_TARGET_PROMPT = """The goal is to create diverse patterns in the design,
 each targeting as many lines as possible in the file '{target_file}'.
 
 The content of the target C++ file `{target_file}` is:
@@ -317,19 +326,21 @@ The objective is MAXIMIZING the coverage of the C++ file.
 
 Generate only the design file for this single C++ file based on the given platform."""
 
+# The initial prompt describes the target, then asks for the design.
+# It is split once, so that generating it only concatenates strings.
+_INITIAL_TEMPLATE: PromptTemplate = tuple(
+    (literal, field) for literal, field, _, _ in Formatter().parse(f"{_TARGET_PROMPT}\n\n{_INITIAL_PROMPT}")
+)
+
 # Feedback Prompt - Updated to reinforce snippet requirements
-_FEEDBACK_PROMPT = """The following DEF design was generated to maximise coverage of the OpenROAD C++ file '{target_file}', but it was rejected by OpenROAD.
+# The feedback prompt is split around the faulty design, so that only the part depending on the target is formatted,
+# once per target. The design and the errors are inserted between the header and the footer.
+_FEEDBACK_HEADER = """The following DEF design was generated to maximise coverage of the OpenROAD C++ file '{target_file}', but it was rejected by OpenROAD.
 The goal was to generate a complex design, valid, targeting as many features of this file as possible.
 
-Faulty generated design:
-```def
-{generated_code}
-```
+"""
 
-OpenROAD Error Output (Stderr focused):
-```text
-{error_summary}
-```
+_FEEDBACK_FOOTER = """
 
 Please analyze the faulty DEF design, and the errors.
 Provide a corrected version of the design that fixes the error(s) while adhering strictly to ALL the requirements:
@@ -339,23 +350,95 @@ Provide a corrected version of the design that fixes the error(s) while adhering
 Generate only the corrected DEF design."""
 
 
+def _fill_template(template: PromptTemplate, **fields: str) -> str:
+    """Insert the fields in a split prompt template.
+
+    Args:
+        template (PromptTemplate): The split prompt template.
+        **fields (str): The value of each field of the template.
+
+    Returns:
+        str: The filled prompt.
+    """
+    parts: list[str] = []
+    for literal, field in template:
+        parts.append(literal)
+        if field is not None:
+            parts.append(fields[field])
+
+    return "".join(parts)
+
+
+def _read_lef(file: "Path") -> str:
+    """Read a LEF file.
+
+    Args:
+        file (Path): The LEF file.
+
+    Returns:
+        str: The content of the file.
+    """
+    return file.read_bytes().decode("utf-8")
+
+
+@lru_cache(maxsize=64)
+def _format_feedback_header(target_file: str) -> str:
+    """Format the header of the feedback prompt, which only depends on the target.
+
+    Args:
+        target_file (str): The target file name.
+
+    Returns:
+        str: The formatted header of the feedback prompt.
+    """
+    return _FEEDBACK_HEADER.format(target_file=target_file)
+
+
+@lru_cache(maxsize=4)
+def _format_technology_prompt(lef_files: tuple[tuple["Path", int], ...]) -> str:
+    """Format the technology system prompt, reading the LEF files.
+
+    Args:
+        lef_files (tuple[tuple[Path, int], ...]): The resolved path and modification time of the LEF files.
+            The modification time is only part of the cache key, so that modified files are read again.
+
+    Returns:
+        str: The formatted technology system prompt.
+    """
+    files = [file for file, _ in lef_files]
+
+    # Reading each file is latency-bound, so the files are read concurrently.
+    with ThreadPoolExecutor(max_workers=max(1, min(MAX_READ_WORKERS, len(files)))) as executor:
+        contents = executor.map(_read_lef, files)
+
+        lef = "\n\n".join(
+            f"File: {file.name}\nContent:\n```lef\n{content}\n```"
+            for file, content in zip(files, contents, strict=True)
+        )
+
+    return _TECHNOLOGY_SYSTEM_PROMPT.format(lef_files=lef)
+
+
 def format_technology_prompt(lef_files: list["Path"]) -> str:
     """Format the technology system prompt with the provided LEF files.
 
+    The prompt is cached, so that the same library is only read once for all targets.
+
     Args:
         lef_files (list[Path]): List of LEF files for the technology platform.
 
     Returns:
         str: The formatted technology system prompt.
     """
-    lef = "\n\n".join(f"File: {file.name}\nContent:\n```lef\n{file.read_text()}\n```" for file in lef_files)
-
-    return _TECHNOLOGY_SYSTEM_PROMPT.format(lef_files=lef)
+    return _format_technology_prompt(tuple((file.resolve(), file.stat().st_mtime_ns) for file in lef_files))
 
 
 def get_system_prompts(target_file: str, target_content: str, coverage: str, library_files: list["Path"]) -> list[str]:
     """Generate the system prompts.
 
+    They only depend on the library, so that they form a prefix shared by all the requests,
+    which can be cached by the provider. The target is described in the initial prompt.
+
     Args:
         target_file (str): The target file name.
         target_content (str): The content of the target file.
@@ -366,15 +449,12 @@ def get_system_prompts(target_file: str, target_content: str, coverage: str, lib
         list[str]: A list of system prompts.
     """
     technology_prompt = format_technology_prompt(lef_files=library_files)
-    target_prompt = _TARGET_SYSTEM_PROMPT.format(
-        target_file=target_file, target_content=target_content, coverage_excerpt=coverage
-    )
 
-    return [technology_prompt, _DEF_SYNTAX_PROMPT, target_prompt]
+    return [technology_prompt, _DEF_SYNTAX_PROMPT]
 
 
 def get_initial_prompt(target_file: str, target_content: str, coverage: str, library_files: list["Path"]) -> str:
-    """Generate the initial prompt.
+    """Generate the initial prompt, describing the target.
 
     Args:
         target_file (str): The target file name.
@@ -385,7 +465,9 @@ def get_initial_prompt(target_file: str, target_content: str, coverage: str, lib
     Returns:
         str: The initial prompt.
     """
-    return _INITIAL_PROMPT.format(target_file=target_file)
+    return _fill_template(
+        _INITIAL_TEMPLATE, target_file=target_file, target_content=target_content, coverage_excerpt=coverage
+    )
 
 
 def get_feedback_prompt(  # noqa: PLR0913, PLR0917
@@ -398,6 +480,9 @@ def get_feedback_prompt(  # noqa: PLR0913, PLR0917
 ) -> str:
     """Generate the feedback prompt.
 
+    It is sent after the initial prompt, so that only this message changes between attempts.
+    Its header is formatted once per target, only the faulty design and the errors are inserted for each attempt.
+
     Args:
         target_file (str): The target file name.
         target_content (str): The content of the target file.
@@ -409,7 +494,12 @@ def get_feedback_prompt(  # noqa: PLR0913, PLR0917
     Returns:
         str: The feedback prompt to be given to the LLM..
     """
-    return _FEEDBACK_PROMPT.format(target_file=target_file, generated_code=generated_code, error_summary=error_summary)
+    return (
+        f"{_format_feedback_header(target_file)}"
+        f"Faulty generated design:\n```def\n{generated_code}\n```\n\n"
+        f"OpenROAD Error Output (Stderr focused):\n```text\n{error_summary}\n```"
+        f"{_FEEDBACK_FOOTER}"
+    )
 
 
 __all__ = ["get_feedback_prompt", "get_initial_prompt", "get_system_prompts"]
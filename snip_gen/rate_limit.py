@@ -0,0 +1,86 @@
+"""Limit the rate of requests sent to the LLM providers."""
+
+import asyncio
+import logging
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+WINDOW = 60.0  # Duration in seconds over which the limits apply
+
+
+class RateLimiter:
+    """Limit the number of requests and tokens sent per minute.
+
+    The requests sent during the last minute are kept in a sliding window,
+    so that requests wait for some capacity to be freed instead of being rejected by the provider.
+
+    Attributes:
+        requests_per_minute (int): Maximum number of requests sent per minute.
+        tokens_per_minute (int): Maximum number of tokens sent per minute.
+    """
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int) -> None:
+        """Initialize the rate limiter.
+
+        Args:
+            requests_per_minute (int): Maximum number of requests sent per minute.
+            tokens_per_minute (int): Maximum number of tokens sent per minute.
+        """
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+
+        self._lock = asyncio.Lock()
+        # Time and number of tokens of the requests sent during the last minute.
+        self._requests: deque[tuple[float, int]] = deque()
+        self._tokens = 0
+
+    def _expire(self, now: float) -> None:
+        """Forget the requests which left the window.
+
+        Args:
+            now (float): The current time, as given by `time.monotonic`.
+        """
+        while self._requests and self._requests[0][0] <= now - WINDOW:
+            _, tokens = self._requests.popleft()
+            self._tokens -= tokens
+
+    def _has_capacity(self, tokens: int) -> bool:
+        """Check whether a request can be sent right now.
+
+        A request larger than the token limit is sent once the window is empty, instead of waiting forever.
+
+        Args:
+            tokens (int): The number of tokens of the request.
+
+        Returns:
+            bool: Whether the request fits in the limits.
+        """
+        if not self._requests:
+            return True
+
+        return len(self._requests) < self.requests_per_minute and self._tokens + tokens <= self.tokens_per_minute
+
+    async def acquire(self, tokens: int) -> None:
+        """Wait until a request can be sent without exceeding the limits, and record it.
+
+        Waiting requests are served in order.
+
+        Args:
+            tokens (int): The estimated number of tokens of the request.
+        """
+        async with self._lock:
+            now = time.monotonic()
+            self._expire(now)
+
+            while not self._has_capacity(tokens):
+                delay = self._requests[0][0] + WINDOW - now
+                logger.info("Rate limit reached, waiting %.1f seconds before sending the request...", delay)
+                await asyncio.sleep(delay)
+
+                now = time.monotonic()
+                self._expire(now)
+
+            self._requests.append((now, tokens))
+            self._tokens += tokens
@@ -1,5 +0,0 @@
-foreach lef $::env(LEF_FILES) {
-    read_lef $lef
-}
-
-read_def $::env(DEF_FILE)
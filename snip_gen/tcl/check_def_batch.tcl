@@ -0,0 +1,10 @@
+source [file join [file dirname [info script]] verify_def.tcl]
+
+# The LEF files are read once, then each DEF file is read into an empty design.
+read_lef_list $::env(LEF_LIST_FILE)
+
+set index 0
+foreach def [read_path_list $::env(DEF_LIST_FILE)] {
+    verify_def $index $def
+    incr index
+}
@@ -0,0 +1,11 @@
+source [file join [file dirname [info script]] verify_def.tcl]
+
+# The LEF files are read once, then OpenROAD keeps running, verifying the DEF files sent by verify_code.py
+# on its standard input. OpenROAD stops at the end of its input.
+if {[catch {read_lef_list $::env(LEF_LIST_FILE)} error]} {
+    puts $error
+    exit 1
+}
+
+puts "SNIP_GEN_READY"
+flush stdout
@@ -0,0 +1,35 @@
+# Procedures shared by the scripts verifying DEF files, sourced by each of them.
+
+# Get the paths listed, one per line, in a file.
+proc read_path_list {list_file} {
+    set path_list [open $list_file r]
+    set paths [split [read -nonewline $path_list] "\n"]
+    close $path_list
+    return $paths
+}
+
+# Read the library files listed in a file.
+proc read_lef_list {list_file} {
+    foreach lef [read_path_list $list_file] {
+        read_lef $lef
+    }
+}
+
+# Read a DEF file into an empty design, then destroy the design.
+# The output of the DEF file is delimited by markers, parsed by verify_code.py.
+proc verify_def {index def} {
+    puts "SNIP_GEN_FILE:$index"
+    flush stdout
+
+    if {[catch {read_def $def} error]} {
+        puts "SNIP_GEN_RESULT:ERR $error"
+    } else {
+        puts "SNIP_GEN_RESULT:OK"
+    }
+    flush stdout
+
+    set chip [[ord::get_db] getChip]
+    if {$chip != "NULL"} {
+        odb::dbChip_destroy $chip
+    }
+}
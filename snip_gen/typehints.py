@@ -1,16 +1,39 @@
 """Typehints."""
 
+import importlib
 import json
 import typing as t
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
 
 if t.TYPE_CHECKING:
     from snip_gen import MODEL_HINT
 
+# Use orjson to parse coverage files when it is available, as it is much faster on large files.
+# Both parsers accept bytes and raise a subclass of json.JSONDecodeError on invalid input.
+try:
+    _json_loads: t.Callable[[bytes], t.Any] = importlib.import_module("orjson").loads
+except ImportError:
+    _json_loads = json.loads
 
-class CoverageFunction(t.TypedDict):
-    """TypedDict for coverage function information.
+
+class RawCoverageFunction(t.TypedDict):
+    """Raw JSON coverage function information.
+
+    Attributes:
+        execution_count (int): Number of times the function was executed.
+        start_line (int): The line number where the function starts.
+    """
+
+    execution_count: int
+    start_line: int
+
+
+class CoverageFunction(t.NamedTuple):
+    """Coverage function information.
+
+    A tuple takes much less memory than a dictionary, which matters for projects with many functions.
 
     Attributes:
         execution_count (int): Number of times the function was executed.
@@ -26,12 +49,12 @@ class RawCoverageFile(t.TypedDict):
 
     Attributes:
         branches (dict[str, list[int]]): Branch coverage information.
-        functions (dict[str, CoverageFunction]): Function coverage information.
+        functions (dict[str, RawCoverageFunction]): Function coverage information.
         lines (dict[str, int]): Line coverage information.
     """
 
     branches: dict[str, list[int]]
-    functions: dict[str, CoverageFunction]
+    functions: dict[str, RawCoverageFunction]
     lines: dict[str, int]
 
 
@@ -48,8 +71,11 @@ class RawCoverage(t.TypedDict):
     sources: dict[str, _RawCoverageFile]
 
 
-class CoverageFile(t.TypedDict):
-    """Raw JSON coverage file information.
+class CoverageFile:
+    """Coverage file information, indexed by line number.
+
+    Each kind of information is only converted from the raw JSON data when it is first accessed,
+    as callers usually only need one of them, for a few files.
 
     Attributes:
         branches (dict[int, list[int]]): Branch coverage information.
@@ -57,16 +83,64 @@ class CoverageFile(t.TypedDict):
         lines (dict[int, int]): Line coverage information.
     """
 
-    branches: dict[int, list[int]]
-    functions: dict[str, CoverageFunction]
-    lines: dict[int, int]
+    __slots__ = ("_branches", "_functions", "_lines", "_raw")
+
+    def __init__(self, raw: RawCoverageFile) -> None:
+        """Initialize the coverage information of a file.
+
+        Args:
+            raw (RawCoverageFile): Raw coverage data of the file.
+        """
+        self._raw = raw
+        self._branches: dict[int, list[int]] | None = None
+        self._functions: dict[str, CoverageFunction] | None = None
+        self._lines: dict[int, int] | None = None
+
+    @property
+    def branches(self) -> dict[int, list[int]]:
+        """Branch coverage information."""
+        if self._branches is None:
+            self._branches = {int(branch): branch_info for branch, branch_info in self._raw["branches"].items()}
+        return self._branches
+
+    @property
+    def functions(self) -> dict[str, CoverageFunction]:
+        """Function coverage information."""
+        if self._functions is None:
+            self._functions = {
+                name: CoverageFunction(function_info["execution_count"], function_info["start_line"])
+                for name, function_info in self._raw["functions"].items()
+            }
+        return self._functions
+
+    @property
+    def lines(self) -> dict[int, int]:
+        """Line coverage information."""
+        if self._lines is None:
+            self._lines = {int(line): count for line, count in self._raw["lines"].items()}
+        return self._lines
 
 
 Coverage = dict[str, CoverageFile]
 
+CoverageItems = t.Iterable[tuple[str, CoverageFile]]
+
 LowCoverageFiles = list[tuple[Path, float, CoverageFile]]
 
 
+def _iter_raw_coverage(raw: RawCoverage) -> t.Iterator[tuple[str, CoverageFile]]:
+    """Convert raw coverage data one source file at a time.
+
+    Args:
+        raw (RawCoverage): Raw coverage data as loaded from a JSON file.
+
+    Yields:
+        tuple[str, CoverageFile]: The path of a source file and its coverage data.
+    """
+    for source, file_info in raw["sources"].items():
+        yield source, CoverageFile(file_info[""])
+
+
 def parse_coverage(raw: RawCoverage) -> Coverage:
     """Convert raw coverage data to a better-structured format.
 
@@ -76,22 +150,42 @@ def parse_coverage(raw: RawCoverage) -> Coverage:
     Returns:
         Coverage: A structured dictionary mapping file paths to their coverage data.
     """
-    coverage: Coverage = {}
+    return dict(_iter_raw_coverage(raw))
 
-    for source, file_info_ in raw["sources"].items():
-        file_info = file_info_[""]
-        branches = {}
-        lines = {}
 
-        for branch, branch_info in file_info["branches"].items():
-            branches[int(branch)] = branch_info
+# Coverage files can be huge, so only the most recent ones are kept in memory.
+@lru_cache(maxsize=4)
+def _load_raw_coverage(file: Path, mtime_ns: int, size: int) -> RawCoverage:  # noqa: ARG001
+    """Load raw coverage data from a JSON file.
 
-        for line, count in file_info["lines"].items():
-            lines[int(line)] = count
+    The modification time and size of the file are part of the cache key,
+    so that the data is reloaded when the file changes.
 
-        coverage[source] = {"branches": branches, "functions": file_info["functions"], "lines": lines}
+    Args:
+        file (Path): Path to the JSON file containing raw coverage data.
+        mtime_ns (int): Modification time of the file, in nanoseconds.
+        size (int): Size of the file, in bytes.
+
+    Returns:
+        RawCoverage: Raw coverage data as loaded from the JSON file.
+    """
+    raw_data: RawCoverage = _json_loads(file.read_bytes())
+
+    return raw_data
+
+
+def _stat_and_load_raw_coverage(file: Path) -> RawCoverage:
+    """Load raw coverage data from a JSON file, using the cache when the file is unchanged.
+
+    Args:
+        file (Path): Path to the JSON file containing raw coverage data.
 
-    return coverage
+    Returns:
+        RawCoverage: Raw coverage data as loaded from the JSON file.
+    """
+    stat = file.stat()
+
+    return _load_raw_coverage(file, stat.st_mtime_ns, stat.st_size)
 
 
 def load_coverage(file: Path) -> Coverage:
@@ -103,13 +197,26 @@ def load_coverage(file: Path) -> Coverage:
     Returns:
         Coverage: A structured dictionary mapping file paths to their coverage data.
     """
-    with file.open(encoding="utf-8") as f:
-        raw_data: RawCoverage = json.load(f)
+    return parse_coverage(_stat_and_load_raw_coverage(file))
+
+
+def iter_coverage(file: Path) -> t.Iterator[tuple[str, CoverageFile]]:
+    """Load coverage data from a JSON file, converting it one source file at a time.
+
+    Unlike `load_coverage`, the converted data is never held in memory for the whole project,
+    so callers only retain the files they are interested in.
+    The JSON file itself is parsed immediately, so decoding errors are raised by this function.
 
-    return parse_coverage(raw_data)
+    Args:
+        file (Path): Path to the JSON file containing raw coverage data.
+
+    Returns:
+        Iterator[tuple[str, CoverageFile]]: The path of each source file and its coverage data.
+    """
+    return _iter_raw_coverage(_stat_and_load_raw_coverage(file))
 
 
-@dataclass(slots=True)
+@dataclass(slots=True, frozen=True)
 class SeedGenArgs:
     """Arguments for the seed generation process.
 
@@ -121,6 +228,14 @@ class SeedGenArgs:
         final_output_dir (Path): Directory where valid seeds will be saved.
         model (MODEL_HINT): Model to use for generating seeds.
         max_retries (int): Maximum number of retries for seed generation.
+        max_concurrent (int): Maximum number of targets processed concurrently.
+        llm_attempts (int): Maximum number of attempts to invoke the LLM on transient errors.
+        llm_base_wait (float): Base delay in seconds of the exponential backoff between LLM attempts.
+        max_output_tokens (int): Maximum number of tokens generated by a single LLM invocation.
+        llm_timeout (float): Maximum duration of a single LLM invocation in seconds.
+        cache (bool): Whether to cache the LLM responses on disk.
+        stream (bool): Whether to stream the LLM responses.
+        candidates (int): Number of designs generated by each LLM invocation.
         target (Literal["file", "function"]): Target type for seed generation.
         library (list[Path]): List of library paths to include in the generation.
         extension (str): File extension for the generated seeds.
@@ -133,12 +248,20 @@ class SeedGenArgs:
     final_output_dir: Path
     model: "MODEL_HINT"
     max_retries: int
+    max_concurrent: int
+    llm_attempts: int
+    llm_base_wait: float
+    max_output_tokens: int
+    llm_timeout: float
+    cache: bool
+    stream: bool
+    candidates: int
     target: t.Literal["file", "function"]
     library: list[Path]
     extension: str
 
 
-@dataclass(slots=True)
+@dataclass(slots=True, frozen=True)
 class CoverageArgs:
     """Arguments for coverage analysis.
 
@@ -153,33 +276,41 @@ class CoverageArgs:
     fastcov_json: Path
 
 
-@dataclass(slots=True)
+@dataclass(slots=True, frozen=True)
 class SnippetGenArgs:
     """Arguments for snippet generation.
 
     Attributes:
         model (str): Model to use for generating snippets.
-        target (Path): Path to the target file for snippet generation.
-        output (Path): Path where the generated snippets will be saved.
+        target (list[Path]): Paths to the target files for snippet generation.
+        output (list[Path]): Paths where the generated snippets will be saved, one for each target.
         library (list[Path]): List of library paths to include in the generation.
         max_retries (int): Maximum number of retries for snippet generation.
+        cache (bool): Whether to cache the LLM responses on disk.
+        stream (bool): Whether to stream the LLM responses.
+        candidates (int): Number of designs generated by each LLM invocation.
     """
 
     model: "MODEL_HINT"
-    target: Path
-    output: Path
+    target: list[Path]
+    output: list[Path]
     library: list[Path]
     max_retries: int
+    cache: bool
+    stream: bool
+    candidates: int
 
 
-@dataclass(slots=True)
+@dataclass(slots=True, frozen=True)
 class VerifyArgs:
     """Arguments for program verification.
 
     Attributes:
-        file (Path): File to verify.
+        files (list[Path]): Files to verify.
         library (list[Path]): List of library paths required for verification.
+        workers (int): Maximum number of OpenROAD processes running at the same time.
     """
 
-    file: Path
+    files: list[Path]
     library: list[Path]
+    workers: int
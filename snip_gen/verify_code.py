@@ -1,15 +1,25 @@
 """Execute code."""
 
 import argparse
+import atexit
+import contextlib
 import logging
+import os
+import queue
+import re
 import shutil
 import subprocess  # noqa: S404
 import sys
+import tempfile
+import threading
+import typing as t
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
 from pathlib import Path
 
 from snip_gen.typehints import VerifyArgs
 
-logging.basicConfig(level=logging.INFO, format="%(levelname)s - %(message)s")
 logger = logging.getLogger(__name__)
 
 
@@ -18,9 +28,146 @@ TCL_ROOT = Path(__file__).parent.resolve() / "tcl"
 
 OPENROAD = shutil.which("openroad") or ""
 
-OPENROAD_CMD = [OPENROAD, "-exit", "-no_init", "-no_splash", "-no_settings", "-threads", "max"]
+OPENROAD_OPTIONS = ("-no_init", "-no_splash", "-no_settings", "-threads", "max")
 
-VERIFY_DEF = [*OPENROAD_CMD.copy(), str(TCL_ROOT / "check_def.tcl")]
+OPENROAD_CMD = (OPENROAD, "-exit", *OPENROAD_OPTIONS)
+
+VERIFY_DEF_BATCH = (*OPENROAD_CMD, str(TCL_ROOT / "check_def_batch.tcl"))
+
+# Without -exit, OpenROAD keeps reading commands from its standard input once the script ran.
+VERIFY_DEF_SERVER = (OPENROAD, *OPENROAD_OPTIONS, str(TCL_ROOT / "check_def_server.tcl"))
+
+# Markers printed by verify_def.tcl before and after the output of each DEF file.
+BATCH_FILE_MARKER = "SNIP_GEN_FILE:"
+BATCH_RESULT_MARKER = "SNIP_GEN_RESULT:"
+
+# Markers printed by the resident OpenROAD once it read the library, and at the end of each request.
+# The end marker is printed on both outputs, so that the standard error is read up to the end of the request.
+SERVER_READY_MARKER = "SNIP_GEN_READY"
+SERVER_END_MARKER = "SNIP_GEN_END"
+
+# How long the resident OpenROAD processes get to exit at the end of the program, in seconds.
+SERVER_EXIT_TIMEOUT = 5
+
+# How long a resident OpenROAD process gets to read the library or to answer a request, in seconds.
+# It is killed afterwards, so that a hung process does not block the verifications waiting for it.
+SERVER_TIMEOUT = 300
+
+# Characters with a special meaning in a TCL word, escaped in the paths sent to the resident OpenROAD.
+TCL_SPECIAL_RE = re.compile(r'[\\\[\]{}"$;\s]')
+
+# Each OpenROAD process already uses several threads, so only half the cores run a process by default.
+VERIFY_WORKERS = max(1, (os.cpu_count() or 2) // 2)
+
+# Only the last lines of each output of OpenROAD are kept, as they hold the errors.
+# The output of each DEF file verified by check_def_batch.tcl is a separate section.
+OUTPUT_TAIL_LINES = 200
+
+# The first line of a section of the output of OpenROAD, and its last lines.
+OutputSection = tuple[str, deque[str]]
+
+# The library files are the same for every verification, so they are only resolved and encoded once.
+_RESOLVED_LEF_FILES: dict[Path, bytes] = {}
+
+# The list of the library files is written once per library, to a file read by the TCL scripts.
+# This keeps the environment of OpenROAD small, however large the library is.
+_LEF_LIST_FILES: dict[tuple[Path, ...], bytes] = {}
+
+# The pools of resident OpenROAD processes, one per library, created on first use only.
+_POOLS: dict[tuple[Path, ...], "_OpenRoadPool"] = {}
+_POOLS_LOCK = threading.Lock()
+
+
+def find_missing_files(files: list[Path]) -> list[Path]:
+    """Find the files which do not exist.
+
+    Each parent directory is listed only once, instead of running a stat on each file.
+    The files are checked with `Path.exists` when the listing is not enough: if their directory cannot be listed,
+    if their name is not an entry of the directory, such as `..`, or if they are symbolic links.
+
+    Args:
+        files (list[Path]): The files to look for.
+
+    Returns:
+        list[Path]: The files that do not exist, in their original order.
+    """
+    by_parent: dict[Path, list[Path]] = {}
+    for file in files:
+        by_parent.setdefault(file.parent, []).append(file)
+
+    missing: set[Path] = set()
+    for parent, children in by_parent.items():
+        try:
+            with os.scandir(parent) as entries:
+                symlinks = {entry.name: entry.is_symlink() for entry in entries}
+        except FileNotFoundError:
+            missing.update(children)
+            continue
+        except OSError:
+            # The files of a directory which cannot be listed may still be accessible.
+            missing.update(child for child in children if not child.exists())
+            continue
+
+        for child in children:
+            if child.name in {"", ".", ".."} or symlinks.get(child.name):
+                if not child.exists():
+                    missing.add(child)
+            elif child.name not in symlinks:
+                missing.add(child)
+
+    return [file for file in files if file in missing]
+
+
+def _resolve_lef(lef: Path) -> bytes:
+    """Get the absolute path of a library file, resolving it on first use only.
+
+    Args:
+        lef (Path): The library file.
+
+    Returns:
+        bytes: The resolved path of the library file, encoded for the environment of OpenROAD.
+    """
+    resolved = _RESOLVED_LEF_FILES.get(lef)
+    if resolved is None:
+        resolved = _RESOLVED_LEF_FILES[lef] = os.fsencode(lef.resolve())
+
+    return resolved
+
+
+@lru_cache(maxsize=8)
+def _banners(step: str) -> tuple[str, str, str]:
+    """Build the lines surrounding the logged outputs of a step.
+
+    Args:
+        step (str): A description of the step being executed.
+
+    Returns:
+        tuple[str, str, str]: The headers of the standard output and the standard error, and their footer.
+    """
+    return f"--- {step} STDOUT ---", f"--- {step} STDERR ---", "-" * (len(step) + 15)
+
+
+def _lef_list_file(library_files: list[Path]) -> bytes:
+    """Get the file listing the library files, writing it on first use only.
+
+    The file is removed when the program exits.
+
+    Args:
+        library_files (list[Path]): The library files.
+
+    Returns:
+        bytes: The path of the file listing the resolved library files, one per line.
+    """
+    key = tuple(library_files)
+
+    list_file = _LEF_LIST_FILES.get(key)
+    if list_file is None:
+        with tempfile.NamedTemporaryFile(prefix="snip_gen_lef_", suffix=".txt", delete=False) as f:
+            f.write(b"".join(_resolve_lef(lef) + b"\n" for lef in library_files))
+        atexit.register(partial(Path(f.name).unlink, missing_ok=True))
+        list_file = _LEF_LIST_FILES[key] = os.fsencode(f.name)
+
+    return list_file
 
 
 def _handle_result(result: subprocess.CompletedProcess[str], step: str) -> tuple[bool, str]:
@@ -34,30 +181,31 @@ def _handle_result(result: subprocess.CompletedProcess[str], step: str) -> tuple
         A tuple where the first element is a boolean indicating whether the code is valid,
         and the second element is a string containing any error messages or an empty string if valid.
     """
-    debug_end = "-" * len(step)
+    stdout_header, stderr_header, footer = _banners(step)
 
+    # The standard output is always returned, the standard error only when it is logged.
     stdout = result.stdout.strip()
-    stderr = result.stderr.strip()
 
-    res = stdout or stderr
+    res = stdout
 
     if stdout:
         if result.returncode != 0:
-            logger.warning(f"--- {step} STDOUT ---")
+            logger.warning(stdout_header)
             logger.warning(stdout)
-            logger.warning(f"---------------{debug_end}")
-        else:
-            logger.debug(f"--- {step} STDOUT ---")
+            logger.warning(footer)
+        elif logger.isEnabledFor(logging.DEBUG):
+            logger.debug(stdout_header)
             logger.debug(stdout)
-            logger.debug(f"---------------{debug_end}")
+            logger.debug(footer)
 
-    if stderr:
-        logger.error(f"--- {step} STDERR ---")
+    if result.stderr and (stderr := result.stderr.strip()):
+        logger.error(stderr_header)
         logger.error(stderr)
-        logger.error(f"---------------{debug_end}")
+        logger.error(footer)
+        res = res or stderr
 
     if result.returncode != 0:
-        logger.error(f"Error running OpenRoad: {res}")
+        logger.error("Error running OpenRoad: %s", res)
         return False, res
     return True, res
 
@@ -80,19 +228,585 @@ def verify_code(file: Path, library_files: list[Path]) -> tuple[bool, str]:
         msg = "OpenRoad is not available"
         raise RuntimeError(msg)
 
+    return verify_code_batch([file], library_files)[0]
+
+
+def verify_source(code: str, library_files: list[Path]) -> tuple[bool, str]:
+    """Verify that the given code is valid, without writing it to the disk.
+
+    Args:
+        code (str): The code to be verified.
+        library_files (list[Path]): A list of paths to library files that are required for the verification.
+
+    Returns:
+        A tuple where the first element is a boolean indicating whether the code is valid,
+        and the second element is a string containing any error messages or an empty string if valid.
+
+    Raises:
+        RuntimeError: If the verification is unavailable.
+    """
+    if not OPENROAD:
+        msg = "OpenRoad is not available"
+        raise RuntimeError(msg)
+
+    return verify_source_batch([code], library_files)[0]
+
+
+def verify_code_batch(files: list[Path], library_files: list[Path]) -> list[tuple[bool, str]]:
+    """Verify that the given files contain valid code.
+
+    The files are sent to one of the OpenROAD processes kept running for the library,
+    which each read the library once instead of once per verification.
+
+    Args:
+        files (list[Path]): The paths to the files to be verified.
+        library_files (list[Path]): A list of paths to library files that are required for the verification.
+
+    Returns:
+        For each file, a tuple where the first element is a boolean indicating whether the code is valid,
+        and the second element is a string containing any error messages or an empty string if valid.
+
+    Raises:
+        RuntimeError: If the verification is unavailable.
+    """
+    if not OPENROAD:
+        msg = "OpenRoad is not available"
+        raise RuntimeError(msg)
+
+    return _run_server_verification([str(file.absolute()) for file in files], library_files)
+
+
+def verify_code_many(
+    files: list[Path], library_files: list[Path], workers: int = VERIFY_WORKERS
+) -> list[tuple[bool, str]]:
+    """Verify that the given files contain valid code, running several OpenROAD processes in parallel.
+
+    The files are split between the processes, each verifying its share in a single run,
+    so that the library files are only read once per process.
+
+    Args:
+        files (list[Path]): The paths to the files to be verified.
+        library_files (list[Path]): A list of paths to library files that are required for the verification.
+        workers (int): Maximum number of OpenROAD processes running at the same time.
+            Each of them loads the library, so this is also bounded by the available memory.
+
+    Returns:
+        For each file, a tuple where the first element is a boolean indicating whether the code is valid,
+        and the second element is a string containing any error messages or an empty string if valid.
+
+    Raises:
+        RuntimeError: If the verification is unavailable.
+    """
+    if not OPENROAD:
+        msg = "OpenRoad is not available"
+        raise RuntimeError(msg)
+
+    workers = max(1, min(workers, len(files)))
+    shares = [files[worker::workers] for worker in range(workers)]
+
+    # The workers only wait for OpenROAD, so threads are enough to run the processes in parallel.
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        share_results = list(
+            executor.map(
+                lambda share: _run_batch_verification([str(file.absolute()) for file in share], library_files),
+                shares,
+            )
+        )
+
+    results: list[tuple[bool, str]] = [(False, "")] * len(files)
+    for worker, share_result in enumerate(share_results):
+        results[worker::workers] = share_result
+
+    return results
+
+
+def verify_source_batch(codes: list[str], library_files: list[Path]) -> list[tuple[bool, str]]:
+    """Verify that the given codes are valid, without writing them to the disk.
+
+    On Linux, each code is stored in an anonymous in-memory file which OpenROAD reads through `/proc`.
+    Elsewhere, they are written to a temporary directory.
+
+    Args:
+        codes (list[str]): The codes to be verified.
+        library_files (list[Path]): A list of paths to library files that are required for the verification.
+
+    Returns:
+        For each code, a tuple where the first element is a boolean indicating whether the code is valid,
+        and the second element is a string containing any error messages or an empty string if valid.
+
+    Raises:
+        RuntimeError: If the verification is unavailable.
+    """
+    if not OPENROAD:
+        msg = "OpenRoad is not available"
+        raise RuntimeError(msg)
+
+    contents = [_encode_design(code) for code in codes]
+
+    if not hasattr(os, "memfd_create"):
+        with tempfile.TemporaryDirectory() as directory:
+            def_files = []
+            for index, content in enumerate(contents):
+                def_file = Path(directory) / f"{index}.def"
+                def_file.write_bytes(content)
+                def_files.append(str(def_file))
+            return _run_server_verification(def_files, library_files)
+
+    fds: list[int] = []
+    try:
+        for content in contents:
+            fds.append(os.memfd_create("snip_gen_verify"))
+            with os.fdopen(fds[-1], "wb", closefd=False) as f:
+                f.write(content)
+        # The resident OpenROAD does not inherit the descriptors, even when this call starts it, so it reads them
+        # through this process: being its child, it is allowed to open the descriptors of its parent.
+        pid = os.getpid()
+        return _run_server_verification([f"/proc/{pid}/fd/{fd}" for fd in fds], library_files)
+    finally:
+        for fd in fds:
+            os.close(fd)
+
+
+def _encode_design(code: str) -> bytes:
+    """Encode a design, with the exact content write_code would save.
+
+    Args:
+        code (str): The code of the design.
+
+    Returns:
+        bytes: The encoded design, ending with a newline.
+    """
+    return code.encode("utf-8") if code.endswith("\n") else f"{code}\n".encode()
+
+
+def _read_output(stream: t.IO[str], sections: list[OutputSection], end: str | None = None) -> bool:
+    """Read an output of OpenROAD while it runs, only keeping the last lines of each section.
+
+    Args:
+        stream (IO[str]): The output of OpenROAD.
+        sections (list[OutputSection]): The sections read so far, to which the output is added.
+        end (str | None): The marker after which the reading stops, or None to read the whole output.
+
+    Returns:
+        bool: Whether the end marker was read, before the output was closed.
+    """
+    debug = logger.isEnabledFor(logging.DEBUG)
+
+    for line in stream:
+        if debug:
+            logger.debug("OpenRoad: %s", line.rstrip())
+
+        if end is not None and line.startswith(end):
+            return True
+        if line.startswith(BATCH_FILE_MARKER):
+            sections.append((line, deque(maxlen=OUTPUT_TAIL_LINES)))
+        else:
+            sections[-1][1].append(line)
+
+    return False
+
+
+def _join_sections(sections: list[OutputSection]) -> str:
+    """Join the sections of an output of OpenROAD.
+
+    Args:
+        sections (list[OutputSection]): The sections of the output.
+
+    Returns:
+        str: The output, with the first line and the last lines of each section.
+    """
+    return "".join(header + "".join(lines) for header, lines in sections)
+
+
+def _tcl_word(value: str) -> str:
+    """Quote a value as a single TCL word.
+
+    Args:
+        value (str): The value to quote.
+
+    Returns:
+        str: The value, with every character having a special meaning in TCL escaped.
+    """
+    return TCL_SPECIAL_RE.sub(lambda match: "\\n" if match[0] == "\n" else f"\\{match[0]}", value)
+
+
+def _run_openroad(command: tuple[str, ...], env: dict[bytes, bytes]) -> subprocess.CompletedProcess[str]:
+    """Run OpenROAD, reading its outputs while it runs.
+
+    Only the end of each output is kept, so that verbose designs do not fill the memory.
+
+    Args:
+        command (tuple[str, ...]): The OpenROAD command.
+        env (dict[bytes, bytes]): The environment of OpenROAD, already encoded.
+
+    Returns:
+        subprocess.CompletedProcess[str]: The result of OpenROAD, with the end of its outputs.
+    """
+    stdout: list[OutputSection] = [("", deque(maxlen=OUTPUT_TAIL_LINES))]
+    stderr: list[OutputSection] = [("", deque(maxlen=OUTPUT_TAIL_LINES))]
+
     # Safety: the executed command is hardcoded and does not include user input.
-    result = subprocess.run(  # noqa: S603
-        VERIFY_DEF,
-        check=False,
-        capture_output=True,
+    with subprocess.Popen(  # noqa: S603
+        command,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
         encoding="utf-8",
-        env={
-            "DEF_FILE": str(file.resolve()),
-            "LEF_FILES": " ".join(str(lef.resolve()) for lef in library_files),
-        },
-    )
+        errors="replace",
+        env=env,
+    ) as process:
+        # Both outputs are read at the same time, so that OpenROAD never blocks on a full pipe.
+        stderr_reader = threading.Thread(target=_read_output, args=(process.stderr, stderr), daemon=True)
+        stderr_reader.start()
+        _read_output(t.cast("t.IO[str]", process.stdout), stdout)
+        stderr_reader.join()
+
+    return subprocess.CompletedProcess(command, process.returncode, _join_sections(stdout), _join_sections(stderr))
+
+
+class _OpenRoadServer:
+    """An OpenROAD process reading a library once, then verifying the DEF files sent on its standard input.
+
+    The process is started on first use, and started again if it exits, for instance after a crash
+    or when it does not answer in time. Verifications are run one at a time.
+    """
+
+    __slots__ = ("_lock", "_process", "_stderr", "_stderr_ends", "library_files")
+
+    def __init__(self, library_files: list[Path]) -> None:
+        """Initialize the server, without starting OpenROAD.
+
+        Args:
+            library_files (list[Path]): The library files read by OpenROAD.
+        """
+        self.library_files = library_files
+        self._lock = threading.Lock()
+        self._process: subprocess.Popen[str] | None = None
+        # The standard error is read continuously, and handed to the verification running when it is written.
+        self._stderr: deque[str] = deque(maxlen=OUTPUT_TAIL_LINES)
+        # Signaled each time the end marker of a request is read on the standard error.
+        self._stderr_ends: queue.SimpleQueue[None] = queue.SimpleQueue()
+
+    def _read_stderr(self, stream: t.IO[str], ends: "queue.SimpleQueue[None]") -> None:
+        """Read the standard error of OpenROAD while it runs, signaling the end of each request.
+
+        Args:
+            stream (IO[str]): The standard error of OpenROAD.
+            ends (queue.SimpleQueue[None]): The queue signaled when the end marker of a request is read.
+        """
+        for line in stream:
+            if line.startswith(SERVER_END_MARKER):
+                ends.put(None)
+            else:
+                self._stderr.append(line)
+
+    def _start(self, stdout: list[OutputSection]) -> subprocess.Popen[str]:
+        """Start OpenROAD, and wait for it to read the library.
+
+        The process is only kept if it is ready to verify DEF files.
+
+        Args:
+            stdout (list[OutputSection]): The sections of the output, to which the output of the start is added.
+
+        Returns:
+            subprocess.Popen[str]: The OpenROAD process.
+        """
+        # Safety: the executed command is hardcoded and does not include user input.
+        process = subprocess.Popen(  # noqa: S603
+            VERIFY_DEF_SERVER,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            encoding="utf-8",
+            errors="replace",
+            env={b"LEF_LIST_FILE": _lef_list_file(self.library_files)},
+        )
+        # Each process gets its own queue, so that a previous process cannot signal the end of a request.
+        self._stderr_ends = queue.SimpleQueue()
+        threading.Thread(target=self._read_stderr, args=(process.stderr, self._stderr_ends), daemon=True).start()
+
+        if self._read_until(process, stdout, SERVER_READY_MARKER):
+            self._process = process
+        else:
+            process.wait()
+
+        return process
+
+    @staticmethod
+    def _read_until(process: subprocess.Popen[str], stdout: list[OutputSection], marker: str) -> bool:
+        """Read the output of OpenROAD up to a marker, killing OpenROAD if the marker does not come in time.
+
+        Args:
+            process (subprocess.Popen[str]): The OpenROAD process.
+            stdout (list[OutputSection]): The sections of the output, to which the output read is added.
+            marker (str): The marker after which the reading stops.
+
+        Returns:
+            bool: Whether the marker was read, before OpenROAD exited or was killed.
+        """
+        expired = threading.Event()
+
+        def expire() -> None:
+            expired.set()
+            process.kill()
+
+        watchdog = threading.Timer(SERVER_TIMEOUT, expire)
+        watchdog.start()
+        try:
+            found = _read_output(t.cast("t.IO[str]", process.stdout), stdout, marker)
+        finally:
+            watchdog.cancel()
+
+        if expired.is_set():
+            logger.error("OpenRoad did not answer within %d seconds, it was killed.", SERVER_TIMEOUT)
+            # The message ends the output of the DEF file being verified, which is the one to blame.
+            stdout[-1][1].append(f"OpenRoad did not answer within {SERVER_TIMEOUT} seconds.\n")
+        return found
+
+    @classmethod
+    def _request(cls, process: subprocess.Popen[str], commands: str, stdout: list[OutputSection]) -> bool:
+        """Send commands to OpenROAD, and read their output.
+
+        Args:
+            process (subprocess.Popen[str]): The OpenROAD process.
+            commands (str): The TCL commands to run.
+            stdout (list[OutputSection]): The sections of the output, to which the output of the commands is added.
+
+        Returns:
+            bool: Whether OpenROAD ran every command in time, instead of exiting or being killed.
+        """
+        stdin = t.cast("t.IO[str]", process.stdin)
+        try:
+            stdin.write(
+                f"{commands}puts stderr {SERVER_END_MARKER}\nflush stderr\nputs {SERVER_END_MARKER}\nflush stdout\n"
+            )
+            stdin.flush()
+        except BrokenPipeError:
+            return False
+
+        return cls._read_until(process, stdout, SERVER_END_MARKER)
+
+    def verify(self, def_files: list[str]) -> subprocess.CompletedProcess[str]:
+        """Verify DEF files.
+
+        Args:
+            def_files (list[str]): The paths to the DEF files, as seen by OpenROAD.
+
+        Returns:
+            subprocess.CompletedProcess[str]: The result of the verification, with the end of the outputs
+                of OpenROAD. The return code is only non-zero if OpenROAD exited.
+        """
+        commands = "".join(f"verify_def {index} {_tcl_word(def_file)}\n" for index, def_file in enumerate(def_files))
+        stdout: list[OutputSection] = [("", deque(maxlen=OUTPUT_TAIL_LINES))]
+
+        with self._lock:
+            process = self._process or self._start(stdout)
+            finished = process is self._process and self._request(process, commands, stdout)
+            if finished:
+                self._wait_stderr()
+            else:
+                self._close()
+            stderr = [self._stderr.popleft() for _ in range(len(self._stderr))]
+
+        returncode = 0 if finished else process.returncode or 1
+        return subprocess.CompletedProcess(VERIFY_DEF_SERVER, returncode, _join_sections(stdout), "".join(stderr))
+
+    def _wait_stderr(self) -> None:
+        """Wait for the standard error of OpenROAD to be read up to the end of the request."""
+        try:
+            self._stderr_ends.get(timeout=SERVER_EXIT_TIMEOUT)
+        except queue.Empty:
+            logger.warning("The standard error of OpenRoad was not read up to the end of the request.")
+
+    def _close(self) -> None:
+        """Stop OpenROAD, which exits at the end of its input."""
+        process, self._process = self._process, None
+        if process is None:
+            return
+
+        with contextlib.suppress(BrokenPipeError):
+            t.cast("t.IO[str]", process.stdin).close()
+        try:
+            process.wait(timeout=SERVER_EXIT_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+    def close(self) -> None:
+        """Stop OpenROAD, once the running verification is finished."""
+        with self._lock:
+            self._close()
+
+
+class _OpenRoadPool:
+    """The resident OpenROAD processes of a library.
+
+    A new process is only started when every other one is busy, so that concurrent verifications,
+    such as those of the targets generated at the same time, do not wait for each other.
+    The number of processes is bounded, as each of them loads the library.
+    """
+
+    __slots__ = ("_condition", "_idle", "_servers", "library_files", "size")
+
+    def __init__(self, library_files: list[Path], size: int = VERIFY_WORKERS) -> None:
+        """Initialize the pool, without starting OpenROAD.
+
+        Args:
+            library_files (list[Path]): The library files read by OpenROAD.
+            size (int): Maximum number of OpenROAD processes.
+        """
+        self.library_files = library_files
+        self.size = size
+        self._condition = threading.Condition()
+        self._servers: list[_OpenRoadServer] = []
+        self._idle: list[_OpenRoadServer] = []
+
+    def verify(self, def_files: list[str]) -> subprocess.CompletedProcess[str]:
+        """Verify DEF files with an idle OpenROAD process, waiting for one if they are all busy.
+
+        Args:
+            def_files (list[str]): The paths to the DEF files, as seen by OpenROAD.
+
+        Returns:
+            subprocess.CompletedProcess[str]: The result of the verification, as returned by `_OpenRoadServer.verify`.
+        """
+        with self._condition:
+            while not self._idle and len(self._servers) >= self.size:
+                self._condition.wait()
+
+            if self._idle:
+                server = self._idle.pop()
+            else:
+                server = _OpenRoadServer(self.library_files)
+                self._servers.append(server)
+
+        try:
+            return server.verify(def_files)
+        finally:
+            with self._condition:
+                self._idle.append(server)
+                self._condition.notify()
+
+    def close(self) -> None:
+        """Stop every OpenROAD process, once their running verifications are finished."""
+        with self._condition:
+            servers = self._servers.copy()
+
+        for server in servers:
+            server.close()
 
-    return _handle_result(result, "Verifying DEF file")
+
+def _pool(library_files: list[Path]) -> _OpenRoadPool:
+    """Get the resident OpenROAD processes of a library, creating their pool on first use only.
+
+    Args:
+        library_files (list[Path]): The library files.
+
+    Returns:
+        _OpenRoadPool: The resident OpenROAD processes of the library.
+    """
+    key = tuple(library_files)
+
+    with _POOLS_LOCK:
+        pool = _POOLS.get(key)
+        if pool is None:
+            if not _POOLS:
+                atexit.register(_close_pools)
+            pool = _POOLS[key] = _OpenRoadPool(library_files)
+
+    return pool
+
+
+def _close_pools() -> None:
+    """Stop every resident OpenROAD."""
+    with _POOLS_LOCK:
+        pools = list(_POOLS.values())
+        _POOLS.clear()
+
+    for pool in pools:
+        pool.close()
+
+
+def _parse_batch_results(result: subprocess.CompletedProcess[str], count: int, step: str) -> list[tuple[bool, str]]:
+    """Split the result of OpenROAD verifying several DEF files into the result of each file.
+
+    Args:
+        result (subprocess.CompletedProcess): The result of OpenROAD.
+        count (int): The number of DEF files verified.
+        step (str): A description of the step being executed, used for logging.
+
+    Returns:
+        For each DEF file, a tuple where the first element is a boolean indicating whether the code is valid,
+        and the second element is a string containing any error messages or an empty string if valid.
+    """
+    _, output = _handle_result(result, step)
+
+    # The files OpenROAD did not get to, for instance because the LEF files are invalid, are failures.
+    results = [(False, output)] * count
+
+    for section in result.stdout.split(BATCH_FILE_MARKER)[1:]:
+        index, _, rest = section.partition("\n")
+        if not index.isdigit() or int(index) >= count:
+            continue
+
+        file_output, found, status = rest.rpartition(BATCH_RESULT_MARKER)
+        if not found:
+            # OpenROAD stopped while verifying this file, for instance because it crashed or was killed.
+            results[int(index)] = (False, rest.strip() or output)
+            continue
+
+        if status.startswith("OK"):
+            results[int(index)] = (True, file_output.strip())
+        else:
+            results[int(index)] = (False, f"{file_output}{status.removeprefix('ERR').lstrip()}".strip())
+
+    # OpenROAD succeeds even when some files are invalid, so their errors are logged here.
+    for file_index, (is_valid, file_output) in enumerate(results):
+        if not is_valid:
+            logger.warning("DEF file %d is invalid: %s", file_index, file_output)
+
+    return results
+
+
+def _run_server_verification(def_files: list[str], library_files: list[Path]) -> list[tuple[bool, str]]:
+    """Verify DEF files with a resident OpenROAD of the library.
+
+    Args:
+        def_files (list[str]): The paths to the DEF files, as seen by OpenROAD.
+        library_files (list[Path]): A list of paths to library files that are required for the verification.
+
+    Returns:
+        For each DEF file, a tuple where the first element is a boolean indicating whether the code is valid,
+        and the second element is a string containing any error messages or an empty string if valid.
+    """
+    result = _pool(library_files).verify(def_files)
+
+    return _parse_batch_results(result, len(def_files), "Verifying DEF files")
+
+
+def _run_batch_verification(def_files: list[str], library_files: list[Path]) -> list[tuple[bool, str]]:
+    """Run OpenROAD once to verify several DEF files.
+
+    Args:
+        def_files (list[str]): The paths to the DEF files, as seen by OpenROAD.
+        library_files (list[Path]): A list of paths to library files that are required for the verification.
+
+    Returns:
+        For each DEF file, a tuple where the first element is a boolean indicating whether the code is valid,
+        and the second element is a string containing any error messages or an empty string if valid.
+    """
+    # The DEF files are listed one per line in a file, as their paths may contain any other separator.
+    with tempfile.NamedTemporaryFile(prefix="snip_gen_def_", suffix=".txt", delete_on_close=False) as f:
+        f.write(b"".join(os.fsencode(def_file) + b"\n" for def_file in def_files))
+        f.close()
+        result = _run_openroad(
+            VERIFY_DEF_BATCH,
+            {
+                b"DEF_LIST_FILE": os.fsencode(f.name),
+                b"LEF_LIST_FILE": _lef_list_file(library_files),
+            },
+        )
+
+    return _parse_batch_results(result, len(def_files), "Verifying DEF files")
 
 
 def write_code(file_path: Path, code: str) -> None:
@@ -105,12 +819,9 @@ def write_code(file_path: Path, code: str) -> None:
     # Ensure directory exists, handle case where file_path is just a filename
     file_path.parent.mkdir(parents=True, exist_ok=True)
 
-    # Ensure the code ends with a newline
-    if not code.endswith("\n"):
-        code += "\n"
-    with file_path.open("w", encoding="utf-8") as f:
-        f.write(code)
-    logger.info(f"Code successfully written to: {file_path}")
+    # Ensure the code ends with a newline, as verified by verify_source
+    file_path.write_bytes(_encode_design(code))
+    logger.info("Code successfully written to: %s", file_path)
 
 
 def register(parser: argparse.ArgumentParser) -> None:
@@ -120,12 +831,19 @@ def register(parser: argparse.ArgumentParser) -> None:
         parser (argparse.ArgumentParser): The argument parser to register the command with.
     """
     parser.add_argument(
-        "file",
+        "files",
+        nargs="+",
         type=Path,
-        help="The file to verify.",
+        help="The files to verify.",
     )
 
     parser.add_argument("--library", required=False, nargs="*", type=Path, help="Library files to be included")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=VERIFY_WORKERS,
+        help=f"Maximum number of OpenROAD processes verifying files at the same time (default: {VERIFY_WORKERS}).",
+    )
 
     parser.set_defaults(func=main)
 
@@ -140,33 +858,37 @@ def validate_args(arguments: argparse.Namespace) -> VerifyArgs | None:
         VerifyArgs | None: A VerifyArgs object if validation is successful, otherwise None.
     """
     args = VerifyArgs(
-        file=Path(arguments.file),
+        files=[Path(f) for f in arguments.files],
         library=[Path(f) for f in arguments.library or []],
+        workers=arguments.workers,
     )
 
     ret_args: VerifyArgs | None = args
 
-    if not args.file.exists():
-        logger.error(f"The specified file does not exist: {arguments.file}")
+    for file in find_missing_files(args.files):
+        logger.error("The specified file does not exist: %s", file)
+        ret_args = None
+
+    if args.workers < 1:
+        logger.error("Workers must be at least 1.")
         ret_args = None
 
-    for file in args.library:
-        if not file.exists():
-            logger.error(f"Library file does not exist: {file}")
-            ret_args = None
+    for file in find_missing_files(args.library):
+        logger.error("Library file does not exist: %s", file)
+        ret_args = None
 
     return ret_args
 
 
 def main(arguments: argparse.Namespace) -> None:
-    """Verify the code in the specified file.
+    """Verify the code in the specified files.
 
     Args:
         arguments (argparse.Namespace): The parsed command-line arguments.
 
     Exit codes:
-        0: Verification successful.
-        1: Verification failed.
+        0: Verification successful for every file.
+        1: Verification failed for at least one file.
         2: Invalid arguments.
     """
     args = validate_args(arguments)
@@ -174,20 +896,38 @@ def main(arguments: argparse.Namespace) -> None:
         logger.error("Invalid arguments provided. Exiting.")
         sys.exit(2)
 
-    is_valid, error_message = verify_code(args.file, args.library)
-
-    if is_valid:
-        logger.info("Code verification successful.")
-        sys.exit(0)
+    if len(args.files) == 1:
+        results = [verify_code(args.files[0], args.library)]
     else:
-        logger.error(f"Code verification failed: {error_message}")
-        sys.exit(1)
+        results = verify_code_many(args.files, args.library, args.workers)
 
+    all_valid = True
+    for file, (is_valid, error_message) in zip(args.files, results, strict=True):
+        if is_valid:
+            logger.info("Code verification successful: %s", file)
+        else:
+            logger.error("Code verification failed for %s: %s", file, error_message)
+            all_valid = False
 
-__all__ = ["register", "verify_code", "write_code"]
+    sys.exit(0 if all_valid else 1)
+
+
+__all__ = [
+    "register",
+    "verify_code",
+    "verify_code_batch",
+    "verify_code_many",
+    "verify_source",
+    "verify_source_batch",
+    "write_code",
+]
 
 
 if __name__ == "__main__":
+    from snip_gen.__main__ import configure_logging
+
     _parser = argparse.ArgumentParser(description="Verify code files.")
     register(_parser)
-    main(_parser.parse_args())
+    _args = _parser.parse_args()
+    configure_logging()
+    main(_args)
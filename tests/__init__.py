@@ -0,0 +1 @@
+"""Tests of snip_gen."""
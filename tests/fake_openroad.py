@@ -0,0 +1,36 @@
+"""A fake resident OpenROAD, answering the requests of verify_code.py as check_def_server.tcl does.
+
+The content of each DEF file decides its result: `valid`, `invalid`, or `hang` to never answer.
+"""
+
+import os
+import shlex
+import sys
+import time
+from pathlib import Path
+
+if not Path(os.environ["LEF_LIST_FILE"]).is_file():
+    print("No library")  # noqa: T201
+    sys.exit(1)
+
+print("SNIP_GEN_READY", flush=True)  # noqa: T201
+
+for line in sys.stdin:
+    match shlex.split(line):
+        case ["verify_def", index, def_file]:
+            content = Path(def_file).read_text(encoding="utf-8").strip()
+            print(f"SNIP_GEN_FILE:{index}")  # noqa: T201
+            if content == "hang":
+                sys.stdout.flush()
+                time.sleep(3600)
+            elif content == "invalid":
+                print(f"[ERROR ODB-0421] {def_file} is invalid")  # noqa: T201
+                print(f"invalid design {index}", file=sys.stderr, flush=True)  # noqa: T201
+                print("SNIP_GEN_RESULT:ERR DEF parser returns an error!")  # noqa: T201
+            else:
+                print(f"[INFO ODB-0128] {def_file} is valid")  # noqa: T201
+                print("SNIP_GEN_RESULT:OK")  # noqa: T201
+        case ["puts", "stderr", text]:
+            print(text, file=sys.stderr, flush=True)  # noqa: T201
+        case ["puts", text]:
+            print(text, flush=True)  # noqa: T201
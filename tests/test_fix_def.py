@@ -0,0 +1,17 @@
+"""Tests of the DEF fixes."""
+
+from snip_gen.fix.fix_def import fix_def
+
+
+def test_last_via_missing_semicolon() -> None:
+    """The semicolon is added at the end of the last via, before the END VIAS line."""
+    code = "VIAS 1 ;\n- via1 ( 0 0 )\nEND VIAS\nCOMPONENTS 1 ;\n- c1 INV ;\nEND COMPONENTS\n"
+
+    assert fix_def(code) == "VIAS 1 ;\n- via1 ( 0 0 ) ; \nEND VIAS\nCOMPONENTS 1 ;\n- c1 INV ;\nEND COMPONENTS\n"
+
+
+def test_nets_trailing_widths() -> None:
+    """Every width following a layer is removed from the routing of NETS."""
+    code = "NETS 1 ;\n- n1 ( a b ) + ROUTED M1 100 ( 0 0 ) ( 10 0 ) NEW M2 100 200 ;\nEND NETS\n"
+
+    assert fix_def(code) == "NETS 1 ;\n- n1 ( a b ) + ROUTED M1  ( 0 0 ) ( 10 0 ) NEW M2  ;\nEND NETS\n"
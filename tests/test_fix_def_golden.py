@@ -0,0 +1,20 @@
+"""Golden tests of the DEF fixes, comparing the fixed designs with their expected version."""
+
+from pathlib import Path
+
+import pytest
+
+from snip_gen.fix.fix_def import fix_def
+
+DATA_ROOT = Path(__file__).parent / "data" / "fix_def"
+
+DESIGNS = sorted(path.name for path in (DATA_ROOT / "input").glob("*.def"))
+
+
+@pytest.mark.parametrize("design", DESIGNS)
+def test_fix_def_golden(design: str) -> None:
+    """Each design of `data/fix_def/input` is fixed into its counterpart in `data/fix_def/expected`."""
+    code = (DATA_ROOT / "input" / design).read_text(encoding="utf-8")
+    expected = (DATA_ROOT / "expected" / design).read_text(encoding="utf-8")
+
+    assert fix_def(code) == expected
@@ -0,0 +1,159 @@
+"""Tests of the verification helpers."""
+
+import os
+import shutil
+import subprocess  # noqa: S404
+import sys
+import typing as t
+from pathlib import Path
+
+import pytest
+
+from snip_gen import verify_code
+from snip_gen.verify_code import _OpenRoadPool, _parse_batch_results, _tcl_word, find_missing_files
+
+FAKE_OPENROAD = Path(__file__).with_name("fake_openroad.py")
+
+TCL_VALUES = ["design.def", "a b\tc", "[exec rm -rf /]", "$env(HOME);{x}", 'back\\slash "quoted"', "line\nbreak"]
+
+
+def test_find_missing_files(tmp_path: Path) -> None:
+    """The files are reported missing exactly when `Path.exists` is false."""
+    (tmp_path / "file").touch()
+    (tmp_path / "directory").mkdir()
+    (tmp_path / "link").symlink_to(tmp_path / "file")
+    (tmp_path / "dangling").symlink_to(tmp_path / "nowhere")
+
+    files = [
+        tmp_path / "file",
+        tmp_path / "missing",
+        tmp_path / "link",
+        tmp_path / "dangling",
+        tmp_path / "directory" / "..",
+        tmp_path / "nowhere" / "file",
+    ]
+
+    assert find_missing_files(files) == [tmp_path / "missing", tmp_path / "dangling", tmp_path / "nowhere" / "file"]
+
+
+def test_find_missing_files_unlisted_directory(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """The files of a directory which cannot be listed are looked for one by one."""
+    (tmp_path / "file").touch()
+
+    def scandir(path: "Path") -> t.NoReturn:
+        raise PermissionError(path)
+
+    monkeypatch.setattr(os, "scandir", scandir)
+
+    assert find_missing_files([tmp_path / "file", tmp_path / "missing"]) == [tmp_path / "missing"]
+
+
+def test_tcl_word() -> None:
+    """Every character with a special meaning in TCL is escaped."""
+    assert _tcl_word("design.def") == "design.def"
+    assert _tcl_word("a b") == "a\\ b"
+    assert _tcl_word("[exec rm]") == "\\[exec\\ rm\\]"
+    assert _tcl_word('$x;{y}"\\') == '\\$x\\;\\{y\\}\\"\\\\'
+    assert _tcl_word("line\nbreak") == "line\\nbreak"
+
+
+@pytest.mark.skipif(shutil.which("tclsh") is None, reason="tclsh is not installed")
+@pytest.mark.parametrize("value", TCL_VALUES)
+def test_tcl_word_round_trip(value: str) -> None:
+    """TCL reads a quoted value back as the original value."""
+    # Safety: the executed command is hardcoded, the input is a fixed test value.
+    result = subprocess.run(  # noqa: S603
+        [t.cast("str", shutil.which("tclsh"))],
+        input=f"puts -nonewline {_tcl_word(value)}\n",
+        capture_output=True,
+        check=True,
+        encoding="utf-8",
+    )
+
+    assert result.stdout == value
+
+
+def test_parse_batch_results() -> None:
+    """Each file gets the result following its marker, files without one are failures."""
+    stdout = (
+        "Reading the library\n"
+        "SNIP_GEN_FILE:0\n[INFO] valid\nSNIP_GEN_RESULT:OK\n"
+        "SNIP_GEN_FILE:1\n[ERROR] invalid\nSNIP_GEN_RESULT:ERR DEF parser returns an error!\n"
+        "SNIP_GEN_FILE:9\nSNIP_GEN_RESULT:OK\n"
+        "SNIP_GEN_FILE:2\nSegmentation fault\n"
+    )
+    result = subprocess.CompletedProcess(["openroad"], 0, stdout, "")
+
+    assert _parse_batch_results(result, 4, "test") == [
+        (True, "[INFO] valid"),
+        (False, "[ERROR] invalid\nDEF parser returns an error!"),
+        (False, "Segmentation fault"),
+        (False, stdout.strip()),
+    ]
+
+
+def test_parse_batch_results_failure() -> None:
+    """When OpenROAD stops before any file, every file fails with its output."""
+    result = subprocess.CompletedProcess(["openroad"], 1, "", "[ERROR] invalid library")
+
+    assert _parse_batch_results(result, 2, "test") == [(False, "[ERROR] invalid library")] * 2
+
+
+@pytest.fixture
+def pool(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> t.Iterator[_OpenRoadPool]:
+    """A pool of fake resident OpenROAD processes.
+
+    Yields:
+        _OpenRoadPool: The pool, closed after the test.
+    """
+    monkeypatch.setattr(verify_code, "VERIFY_DEF_SERVER", (sys.executable, str(FAKE_OPENROAD)))
+    library = tmp_path / "library.lef"
+    library.touch()
+
+    pool = _OpenRoadPool([library], 2)
+    yield pool
+    pool.close()
+
+
+def _design(directory: Path, name: str, content: str) -> str:
+    """Write a design for the fake OpenROAD.
+
+    Returns:
+        str: The path to the design.
+    """
+    path = directory / name
+    path.write_text(content, encoding="utf-8")
+    return str(path)
+
+
+def test_server_verification(tmp_path: Path, pool: _OpenRoadPool) -> None:
+    """The resident OpenROAD verifies each file, its errors are attributed to the right request."""
+    valid = _design(tmp_path, "a [valid] {design} $x;.def", "valid")
+    invalid = _design(tmp_path, "invalid.def", "invalid")
+
+    for _ in range(3):
+        result = pool.verify([valid, invalid, valid])
+
+        assert result.returncode == 0
+        assert result.stderr == "invalid design 1\n"
+        assert _parse_batch_results(result, 3, "test") == [
+            (True, f"[INFO ODB-0128] {valid} is valid"),
+            (False, f"[ERROR ODB-0421] {invalid} is invalid\nDEF parser returns an error!"),
+            (True, f"[INFO ODB-0128] {valid} is valid"),
+        ]
+
+
+def test_server_timeout(tmp_path: Path, pool: _OpenRoadPool, monkeypatch: pytest.MonkeyPatch) -> None:
+    """A resident OpenROAD which does not answer in time is killed, and started again for the next request."""
+    monkeypatch.setattr(verify_code, "SERVER_TIMEOUT", 1)
+    valid = _design(tmp_path, "valid.def", "valid")
+    hang = _design(tmp_path, "hang.def", "hang")
+
+    result = pool.verify([valid, hang])
+
+    assert result.returncode != 0
+    assert _parse_batch_results(result, 2, "test") == [
+        (True, f"[INFO ODB-0128] {valid} is valid"),
+        (False, "OpenRoad did not answer within 1 seconds."),
+    ]
+    assert _parse_batch_results(pool.verify([valid]), 1, "test") == [(True, f"[INFO ODB-0128] {valid} is valid")]